@@ -10,6 +10,7 @@ from contextlib import redirect_stdout
 
 from core.ai_engine import get_ai_engine
 from database.sqlite.criminals_db import DatabaseHandler
+from face_recognition.tracking.best_shot import estimate_face_quality
 
 
 # ============================================================
@@ -175,36 +176,7 @@ class RecognitionEvaluator:
 
 
     def _estimate_embedding_quality(self, face: np.ndarray) -> float:
-        """
-        Fast forensic proxies:
-        - blur
-        - brightness
-        - contrast
-        - face size
-        """
-
-        gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
-
-        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
-        blur_score = min(blur_score / 120.0, 1.0)
-
-        brightness = np.mean(gray) / 255.0
-        brightness_score = 1.0 - abs(brightness - 0.5) * 2
-
-        contrast = np.std(gray) / 128.0
-        contrast_score = min(contrast, 1.0)
-
-        h, w = gray.shape[:2]
-        size_score = min((h * w) / (140 * 140), 1.0)
-
-        quality = (
-            0.30 * blur_score +
-            0.25 * brightness_score +
-            0.25 * contrast_score +
-            0.20 * size_score
-        )
-
-        return float(max(0.0, min(1.0, quality)))
+        return estimate_face_quality(face)
 
 
     def _build_final_score(self, sim, margin, face_conf, emb_quality):
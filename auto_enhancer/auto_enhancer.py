@@ -11,6 +11,7 @@ from core.ai_engine import get_ai_engine
 
 # ===== FACTS LAYER =====
 from auto_enhancer.quality_assessment.core.qa_engine import QualityAssessmentEngine
+from auto_enhancer.quality_assessment.QualityChecker.post_qc.landmark_pose_checker import POSE_CALIBRATION_PATH
 
 # ===== INTELLIGENCE LAYER =====
 from auto_enhancer.intelligence.core.intelligence_engine import IntelligenceEngine
@@ -54,9 +55,22 @@ class AutoEnhancer:
         "super_resolution": "GFPGAN",
     }
 
+    # QA pose backend per mode (forensic keeps FAN precision).
+    # PnP only once calibrated onto FAN's angle scale (see _pose_backend)
+    POSE_BACKENDS = {
+        "forensic": "fan",
+        "enhancement": "landmarks",
+    }
+
     MAX_ENHANCEMENT_ROUNDS = 2   # 🔒 hard safety limit
 
-    def __init__(self, device="cuda", mode="forensic"):
+    # Stages that move / rescale faces (pose rotates, GFPGAN upscales ×2)
+    GEOMETRY_STEPS = ("pose", "super_resolution")
+
+    # Written pixels == decoded pixels only for lossless formats
+    LOSSLESS_EXT = (".png", ".bmp", ".tif", ".tiff")
+
+    def __init__(self, device="cuda", mode="forensic", tiered_qa=False):
 
         try:
             session_root = get_temp_subpath("").parent
@@ -69,7 +83,14 @@ class AutoEnhancer:
         self.mode = mode.lower()
 
         # ---- Core systems ----
-        self.qa = QualityAssessmentEngine(device=device)
+        # Per-face CLIP scores → policy can spare faces that already look good
+        # tiered_qa → FAN / CLIP only when cheap facts are inconclusive
+        self.qa = QualityAssessmentEngine(
+            device=device,
+            clip_mode="faces",
+            tiered=tiered_qa,
+            pose_backend=self._pose_backend()
+        )
         self.brain = IntelligenceEngine(mode=self.mode)
 
         # ---- Central AI engine ----
@@ -82,6 +103,9 @@ class AutoEnhancer:
         self.pose_corrector = PoseCorrector()
         self.gfpgan = GFPGANWrapper()
 
+        # path → pixels this process just wrote (QA skips the re-read)
+        self._pixels = {}
+
 
 
 
@@ -126,10 +150,53 @@ class AutoEnhancer:
             )
 
         out_dir = get_temp_subpath("normalized")
-        out_path = os.path.join(out_dir, os.path.basename(image_path))
+        # Lossless working copy → no extra JPEG generation, pixels reusable
+        out_path = os.path.join(out_dir, Path(image_path).stem + ".png")
 
         cv2.imwrite(out_path, img)
+        self._remember_pixels(out_path, img)
         return out_path
+
+    # =====================================================
+    # QA POSE BACKEND
+    # =====================================================
+
+    def _pose_backend(self):
+        """
+        Uncalibrated PnP yaw / pitch are not on FAN's scale (frontal pitch
+        ≈0° vs FAN ≈+25–30°) → FAN until tuning/calibrate_pose_backends.py
+        --write has produced the fit.
+        """
+        backend = self.POSE_BACKENDS.get(self.mode, "fan")
+
+        if backend == "landmarks" and not POSE_CALIBRATION_PATH.exists():
+            log_event("ENGINE", f"PnP pose calibration missing ({POSE_CALIBRATION_PATH.name}) → FAN pose backend")
+            return "fan"
+
+        return backend
+
+    # =====================================================
+    # IN-MEMORY IMAGE HANDOFF
+    # =====================================================
+
+    def _remember_pixels(self, path, img):
+        """Keep the latest written image so QA can assess it without decoding."""
+        if Path(path).suffix.lower() in self.LOSSLESS_EXT:
+            self._pixels = {str(path): img}
+
+    def _drop_unregistered(self, path, before):
+        """
+        A stage that wrote `path` through the file API left the cache
+        untouched → any pixels held for that path are stale.
+        """
+        if self._pixels is before:
+            self._pixels.pop(str(path), None)
+
+    def _assess(self, path):
+        img = self._pixels.get(str(path))
+        if img is not None:
+            return self.qa.assess_array(img, {"image_path": path})
+        return self.qa.assess(path)
     # =====================================================
     # QC ONLY STAGE (for QC UI preview)
     # =====================================================
@@ -179,7 +246,7 @@ class AutoEnhancer:
         # INITIAL QA (may be slow — UI already redirected)
         # =====================================================
         log_event("ENGINE", "QUALITY ASSESSMENT STARTED")
-        qa_before = self.qa.assess(image_path)
+        qa_before = self._assess(image_path)
         self.log.info("\n" + qa_before.to_console_report("INITIAL"))
 
         log_event("ENGINE", "QUALITY ASSESSMENT COMPLETED")
@@ -246,9 +313,9 @@ class AutoEnhancer:
         if self.mode == "forensic" and hasattr(self, "last_qa_obj"):
             current_qa = self.last_qa_obj
         else:
-            current_qa = self.qa.assess(image_path)
+            current_qa = self._assess(image_path)
 
-        current_faces = current_qa.faces.get("faces", [])
+        current_faces = current_qa.face_list()
 
         # =====================================================
         # PLAN ONCE
@@ -283,12 +350,13 @@ class AutoEnhancer:
             step_type = self.ACTION_MAP.get(raw_type, raw_type)
 
             stage_start = time.time()
+            pixels_before = self._pixels
 
             if step_type == "deblur":
-                out = self._run_deblur(current_path, step)
+                out = self._run_deblur(current_path, step, current_faces)
 
             elif step_type == "super_resolution":
-                out = self._run_superres(current_path)
+                out = self._run_superres(current_path, current_faces)
 
 
             elif step_type == "brightness":
@@ -306,6 +374,8 @@ class AutoEnhancer:
             else:
                 continue
 
+            self._drop_unregistered(out, pixels_before)
+
             elapsed = round(time.time() - stage_start, 2)
             log_event("AUTO-ENHANCER", f"{step_type.upper()} completed in {elapsed}s")
 
@@ -346,6 +416,10 @@ class AutoEnhancer:
             # ---------- ACCEPTED OUTPUT ----------
             current_path = out
 
+            # Geometry changed → stale bboxes / landmarks; later stages re-detect
+            if step_type in self.GEOMETRY_STEPS:
+                current_faces = []
+
             # ✅ SINGLE CALLBACK
             if step_callback:
                 step_callback(step_type, current_path)
@@ -410,7 +484,7 @@ class AutoEnhancer:
         # =====================================================
 
         log_event("QA", "Initial quality assessment started")
-        qa_before = self.qa.assess(image_path)
+        qa_before = self._assess(image_path)
         report["quality_before"] = qa_before.to_dict()
         log_event("QA", "Initial quality assessment completed")
 
@@ -422,7 +496,7 @@ class AutoEnhancer:
 
         current_path = image_path
         current_qa = qa_before
-        current_faces = qa_before.faces.get("faces", []) 
+        current_faces = qa_before.face_list()
         rounds = 1 if self.mode == "forensic" else self.MAX_ENHANCEMENT_ROUNDS
 
         for round_id in range(1, rounds + 1):
@@ -460,13 +534,14 @@ class AutoEnhancer:
                 )
 
                 stage_start = time.time()
+                pixels_before = self._pixels
 
                 if step_type == "deblur":
-                    current_path = self._run_deblur(current_path, step)
+                    current_path = self._run_deblur(current_path, step, current_faces)
 
 
                 elif step_type == "super_resolution":
-                    current_path = self._run_superres(current_path)
+                    current_path = self._run_superres(current_path, current_faces)
 
                 elif step_type == "brightness":
                     current_path = self._run_brightness(current_path, step)
@@ -484,6 +559,8 @@ class AutoEnhancer:
                     log_event("AUTO-ENHANCER", f"Unknown step ignored → {step_type}", level="WARNING")
                     continue
 
+                self._drop_unregistered(current_path, pixels_before)
+
                 elapsed = round(time.time() - stage_start, 2)
 
                 report["steps"].append({
@@ -495,9 +572,13 @@ class AutoEnhancer:
 
                 log_event("AUTO-ENHANCER", f"{step_type.upper()} completed in {elapsed}s")
 
+                # Geometry changed → stale bboxes / landmarks; later stages re-detect
+                if step_type in self.GEOMETRY_STEPS:
+                    current_faces = []
+
             # ---------- QA AFTER ROUND ----------
-            current_qa = self.qa.assess(current_path)
-            current_faces = current_qa.faces.get("faces", [])   # 🔥 UPDATE QA FACES
+            current_qa = self._assess(current_path)
+            current_faces = current_qa.face_list()   # 🔥 UPDATE QA FACES
             self.log.info("\n" + current_qa.to_console_report(f"ROUND-{round_id}"))
 
 
@@ -506,7 +587,7 @@ class AutoEnhancer:
         # =====================================================
 
         log_event("QA", "Final quality assessment started")
-        qa_after = self.qa.assess(current_path)
+        qa_after = self._assess(current_path)
         report["quality_after"] = qa_after.to_dict()
         report["final_image"] = current_path
         log_event("QA", "Final quality assessment completed")
@@ -556,22 +637,41 @@ class AutoEnhancer:
     # MODULE EXECUTORS
     # =====================================================
 
-    def _run_deblur(self, image_path, step):
-        log_event("ENGINE", f"DEBLUR stage started (HI-DIFF) | strength={step.get('strength')}")
+    def _run_deblur(self, image_path, step, faces=None):
+        import cv2
 
-        return self.deblurrer.enhance(
-            image_path,
-            strength=step.get("strength", "medium")
+        region = step.get("region", "full")
+        strength = step.get("strength", "medium")
+        log_event("ENGINE", f"DEBLUR stage started (HI-DIFF) | strength={strength} | region={region}")
+
+        # ndarray API (every strength) → restored pixels stay in memory for the next QA
+        img = self._pixels.get(str(image_path))
+        if img is None:
+            img = cv2.imread(image_path)
+            if img is None:
+                raise ValueError(f"Failed to read image for HI-DIFF: {image_path}")
+
+        restored = self.deblurrer.deblur(
+            img,
+            strength,
+            faces=faces if region == "faces" else None,
+            profile=step.get("profile")
         )
 
+        out = str(get_temp_subpath("autoenhancement/blur") / (Path(image_path).stem + ".png"))
+        cv2.imwrite(out, restored)
+        self._remember_pixels(out, restored)
+        return out
+
 
-    def _run_superres(self, image_path):
+    def _run_superres(self, image_path, faces=None):
         if not self.gfpgan:
             self.log.warning("GFPGAN not initialized — skipping")
             return image_path
 
         out_dir = get_temp_subpath("superres")
 
+        # QA landmarks (same geometry) → GFPGAN skips its own RetinaFace pass
         return self.gfpgan.enhance_image(
             image_path,
             {
@@ -579,7 +679,8 @@ class AutoEnhancer:
                 "restored_faces": out_dir,
                 "cmp": out_dir,
                 "restored_imgs": out_dir,
-            }
+            },
+            faces=faces or None
         )
 
 
@@ -3,6 +3,7 @@ import os
 import numpy as np
 import shutil
 from utils.logger import log_event
+from utils.image_stats import gray_histogram_stats
 
 
 class CLAHEContrastWrapper:
@@ -24,13 +25,12 @@ class CLAHEContrastWrapper:
     # QA METRICS (internal safety only)
     # -------------------------
     def _compute_contrast_metrics(self, gray):
-        contrast_std = float(gray.std())
-        p5, p95 = np.percentile(gray, (5, 95))
-        spread = float(p95 - p5)
+        stats = gray_histogram_stats(gray, (5, 95))
+        p5, p95 = stats["percentiles"][5], stats["percentiles"][95]
 
         return {
-            "std": contrast_std,
-            "spread": spread
+            "std": stats["std"],
+            "spread": float(p95 - p5)
         }
 
     # -------------------------
@@ -0,0 +1,503 @@
+import sys
+import threading
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+import os
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+import yaml
+
+from utils.logger import log_event
+from core.inference_utils import (
+    DEFAULT_PRECISION, resolve_precision, prepare_module, to_layout, inference_context
+)
+from core.model_compiler import CompiledModule, get_model_compiler, bucket_size, weights_stamp
+
+
+# ---------------- Configuration ---------------- #
+
+HI_DIFF_ROOT = Path(__file__).resolve().parent
+
+_OPTIONS = HI_DIFF_ROOT / "options" / "test"
+
+# Profile → weights variant + reverse-diffusion steps (None = as trained).
+# Profiles sharing an options file share one set of resident weights;
+# only the noise schedule is rebuilt per step count.
+# Cost scales roughly with timesteps; see tuning/benchmark_hidiff_profiles.py
+HIDIFF_PROFILES = {
+    "realblur_fast": {"options": _OPTIONS / "RealBlur_J.yml", "timesteps": 4},
+    "realblur":      {"options": _OPTIONS / "RealBlur_J.yml", "timesteps": 8},
+    "realblur_full": {"options": _OPTIONS / "RealBlur_J.yml", "timesteps": None},   # 16
+    "gopro_fast":    {"options": _OPTIONS / "GoPro.yml",      "timesteps": 4},
+    "gopro":         {"options": _OPTIONS / "GoPro.yml",      "timesteps": None},   # 8
+}
+
+DEFAULT_PROFILE = "realblur_full"
+
+# Tiled inference defaults
+TILE_SIZE = 512
+TILE_OVERLAP = 32
+TILE_BATCH = 4
+
+# Face-ROI mode: context kept around each box (fraction of box side)
+ROI_EXPAND = 0.35
+
+_NULL = open(os.devnull, "w")
+
+
+# ========================================================
+# Global singleton instance
+# ========================================================
+
+_HIDIFF_ENGINE = None
+_HIDIFF_ENGINE_LOCK = threading.Lock()
+
+
+def get_hidiff_engine(device=None):
+    global _HIDIFF_ENGINE
+    with _HIDIFF_ENGINE_LOCK:
+        if _HIDIFF_ENGINE is None:
+            _HIDIFF_ENGINE = HiDiffEngine(device=device)
+    return _HIDIFF_ENGINE
+
+
+# Sub-networks held by HI_Diff_S2 (diffusion = DDPM; net_d only in training)
+HIDIFF_NETS = ("net_le", "net_le_dm", "net_d", "net_g", "diffusion")
+
+
+class _LocalSchedule(torch.nn.Module):
+    """
+    HI_Diff_S2's local (non-LDM) noise schedule at another step count.
+    Reuses the model's own schedule / posterior code and shares its net_d.
+    """
+
+    def __init__(self, model, schedule_opt):
+        super().__init__()
+        self.net_d = model.net_d
+        self._math = type(model)
+        self._math.set_new_noise_schedule(self, schedule_opt, model.device)
+
+    def predict_start_from_noise(self, x_t, t, noise):
+        return self._math.predict_start_from_noise(self, x_t, t, noise)
+
+    def q_posterior(self, x_start, x_t, t):
+        return self._math.q_posterior(self, x_start, x_t, t)
+
+    def p_mean_variance(self, x, t, condition_x):
+        return self._math.p_mean_variance(self, x, t, condition_x=condition_x)
+
+
+class _HiDiffGraph(torch.nn.Module):
+    """
+    Prior sampling (LDM or local schedule) + net_g as one traceable module.
+    The initial noise is an input → callers seed it with their own generator.
+    """
+
+    def __init__(self, model, schedule):
+        super().__init__()
+        self.net_g = model.net_g
+        self.schedule = schedule
+        self.apply_ldm = bool(model.apply_ldm)
+        self.steps = int(schedule.num_timesteps)
+
+        if self.apply_ldm:
+            self.condition = schedule.condition
+            self.noise_shape = (schedule.group * schedule.group, schedule.channels * 4)
+        else:
+            le_dm = model.opt["network_le_dm"]
+            self.condition = model.net_le_dm
+            self.noise_shape = (le_dm["group"] * le_dm["group"], le_dm["embed_dim"] * 4)
+
+    def forward(self, img, noise):
+        c = self.condition(img)
+        prior = noise
+
+        # Both samplers keep the posterior mean only (no variance term)
+        for i in reversed(range(self.steps)):
+            if self.apply_ldm:
+                t = torch.full((img.shape[0],), i, device=img.device, dtype=torch.long)
+                prior = self.schedule.p_mean_variance(prior, t, c, clip_denoised=self.schedule.clip_denoised)[0]
+            else:
+                prior = self.schedule.p_mean_variance(prior, i, condition_x=c)[0]
+
+        return self.net_g(img, prior)
+
+
+class HiDiffEngine:
+    """
+    In-process HI-Diff runner.
+
+    ✔ Builds HI_Diff_S2 once per weights file and keeps it resident;
+      profiles only add a noise schedule (step count)
+    ✔ Seeded per call with a local generator (global RNG untouched)
+    ✔ ndarray in → ndarray out (no dataset / YAML / subprocess)
+    ✔ Same preprocessing and padding as test.py
+    ✔ Tiled mode (overlap + feathered blend, batched tiles) for large inputs
+    ✔ ROI mode (expanded face boxes, batched, feathered paste-back)
+    ✔ inference_mode, opt-in bf16 autocast / channels_last (core.inference_utils)
+    ✔ Optional compiled graphs per input bucket (core.model_compiler)
+    """
+
+    def __init__(self, device=None, precision=DEFAULT_PRECISION, channels_last=False):
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+        self.precision = resolve_precision(device, precision)
+        self.channels_last = channels_last
+
+        self._models = {}   # options file → HI_Diff_S2 (resident weights)
+        self._graphs = {}   # profile → CompiledModule(_HiDiffGraph)
+        self._lock = threading.Lock()
+        self.compiler = get_model_compiler()
+
+        # Tiled mode: images whose long side exceeds tile_size are split
+        # into overlapping tiles; smaller batches on CPU keep RAM flat
+        self.tile_size = TILE_SIZE
+        self.tile_overlap = TILE_OVERLAP
+        self.tile_batch = TILE_BATCH if str(device).startswith("cuda") else 1
+
+        # hi_diff / ldm / vendored basicsr live next to this file
+        # (app.py already does this; kept for standalone use)
+        root = str(HI_DIFF_ROOT)
+        if root not in sys.path:
+            sys.path.insert(0, root)
+
+    # ------------------------------------------------
+    # Options (mirrors hi_diff.utils.options.parse_options, test mode)
+    # ------------------------------------------------
+
+    def _load_options(self, yml_path: Path) -> dict:
+        from hi_diff.utils.options import ordered_yaml
+
+        with open(yml_path, "r") as f:
+            opt = yaml.load(f, Loader=ordered_yaml()[0])
+
+        opt["dist"] = False
+        opt["rank"], opt["world_size"] = 0, 1
+        opt["is_train"] = False
+        opt["auto_resume"] = False
+        opt["num_gpu"] = 1 if str(self.device).startswith("cuda") else 0
+
+        # Pretrained paths are relative to the HI-Diff root
+        for key, val in opt["path"].items():
+            if val is not None and "pretrain_network" in key:
+                opt["path"][key] = str(HI_DIFF_ROOT / val)
+
+        return opt
+
+    def _build(self, yml_path: Path):
+        opt = self._load_options(yml_path)
+
+        with redirect_stdout(_NULL), redirect_stderr(_NULL):
+            import hi_diff  # noqa: F401  (registers archs / models)
+            from hi_diff.models import build_model
+            model = build_model(opt)
+
+        # Prepare only the inference sub-networks, by name
+        for name in HIDIFF_NETS:
+            net = getattr(model, name, None)
+            if isinstance(net, torch.nn.Module):
+                prepare_module(net, self.channels_last)
+
+        log_event(
+            "ENGINE",
+            f"HI-DIFF resident → weights={Path(yml_path).stem} | device={model.device} | "
+            f"precision={self.precision} | channels_last={self.channels_last}"
+        )
+        return model
+
+    def _build_graph(self, profile: str, model):
+        """Noise schedule for the profile's step count on the shared weights."""
+        spec = HIDIFF_PROFILES[profile]
+        schedule_opt = dict(model.opt["diffusion_schedule"])
+        trained = schedule_opt["timesteps"]
+        schedule_opt["timesteps"] = spec.get("timesteps") or trained
+
+        if model.apply_ldm and schedule_opt["timesteps"] == trained:
+            schedule = model.diffusion
+        elif model.apply_ldm:
+            from ldm.ddpm import DDPM
+
+            with redirect_stdout(_NULL):
+                schedule = DDPM(
+                    denoise=model.net_d,
+                    condition=model.net_le_dm,
+                    n_feats=model.opt["network_g"]["embed_dim"],
+                    group=model.opt["network_g"]["group"],
+                    linear_start=schedule_opt["linear_start"],
+                    linear_end=schedule_opt["linear_end"],
+                    timesteps=schedule_opt["timesteps"]
+                )
+            schedule = prepare_module(schedule.to(model.device), self.channels_last)
+        else:
+            schedule = _LocalSchedule(model, schedule_opt)
+
+        weights = [v for k, v in model.opt["path"].items() if v is not None and "pretrain_network" in k]
+        # "n": graph takes (img, noise) → older single-input artifacts never match
+        stamp = weights_stamp(*weights) + f"s{schedule_opt['timesteps']}n"
+
+        log_event("ENGINE", f"HI-DIFF profile ready → {profile} | steps={schedule_opt['timesteps']}")
+
+        return CompiledModule(
+            f"hidiff_{profile}", _HiDiffGraph(model, schedule), model.device, self.precision, stamp, self.compiler
+        )
+
+    def get_model(self, profile: str = DEFAULT_PROFILE):
+        if profile not in HIDIFF_PROFILES:
+            raise ValueError(f"Unknown HI-Diff profile: {profile}")
+
+        key = str(HIDIFF_PROFILES[profile]["options"])
+
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._build(HIDIFF_PROFILES[profile]["options"])
+            if profile not in self._graphs:
+                self._graphs[profile] = self._build_graph(profile, self._models[key])
+            return self._models[key]
+
+    def preload_compiled(self, profile: str = DEFAULT_PROFILE) -> int:
+        """Warmup: load every cached compiled bucket for profile."""
+        if not self.compiler.enabled:
+            return 0
+        self.get_model(profile)
+        return self._graphs[profile].preload()
+
+    # ------------------------------------------------
+    # Forward (HI_Diff_S2.test without the train() toggling)
+    # ------------------------------------------------
+
+    def _forward(self, model, lq: torch.Tensor, profile: str, generator) -> torch.Tensor:
+        """(B, 3, H, W) in [0, 1] on model.device → same shape."""
+        _, _, h, w = lq.size()
+
+        # Compiled graphs are shape-specialised → pad to a coarse bucket
+        if self.compiler.enabled:
+            ph, pw = bucket_size(h) - h, bucket_size(w) - w
+        else:
+            ph, pw = (8 - h % 8) % 8, (8 - w % 8) % 8
+        mode = "reflect" if ph < h and pw < w else "replicate"
+        img = to_layout(F.pad(lq, (0, pw, 0, ph), mode), self.channels_last)
+
+        graph = self._graphs[profile]
+        noise = torch.randn(
+            (lq.shape[0], *graph.module.noise_shape), generator=generator, device=model.device
+        )
+
+        out = graph(img, noise)
+        return out[:, :, :h, :w].float()
+
+    def _generator(self, model):
+        """Per-call RNG like the old one-process-per-image runs → reproducible output."""
+        return torch.Generator(device=model.device).manual_seed(model.opt.get("manual_seed") or 100)
+
+    # ------------------------------------------------
+    # Tiling
+    # ------------------------------------------------
+
+    @staticmethod
+    def _tile_starts(length: int, tile: int, overlap: int):
+        if length <= tile:
+            return [0]
+        # Fewest tiles that keep at least `overlap` px shared, spread evenly
+        n = -(-(length - overlap) // (tile - overlap))
+        return [round(i * (length - tile) / (n - 1)) for i in range(n)]
+
+    @staticmethod
+    def _feather(h: int, w: int, overlap: int) -> np.ndarray:
+        """Linear ramp over the overlap band, 1.0 inside; never zero."""
+        def ramp(n):
+            r = np.ones(n, dtype=np.float32)
+            k = min(overlap, n // 2)
+            if k > 0:
+                edge = np.arange(1, k + 1, dtype=np.float32) / (k + 1)
+                r[:k] = edge
+                r[-k:] = edge[::-1]
+            return r
+        return np.outer(ramp(h), ramp(w))
+
+    def _forward_tiled(self, model, lq: torch.Tensor, profile: str, tile: int, overlap: int,
+                       tile_batch: int, generator):
+        """
+        Fixed-size tiles, batched, feather-blended on the CPU.
+        Peak device memory is bounded by tile_batch × tile².
+        """
+        _, c, h, w = lq.shape
+        th, tw = min(tile, h), min(tile, w)
+
+        boxes = [
+            (y, x)
+            for y in self._tile_starts(h, th, overlap)
+            for x in self._tile_starts(w, tw, overlap)
+        ]
+
+        weight = torch.from_numpy(self._feather(th, tw, overlap))
+        acc = torch.zeros((c, h, w), dtype=torch.float32)
+        norm = torch.zeros((1, h, w), dtype=torch.float32)
+
+        for i in range(0, len(boxes), tile_batch):
+            chunk = boxes[i:i + tile_batch]
+            tiles = torch.cat([lq[:, :, y:y + th, x:x + tw] for y, x in chunk], dim=0)
+
+            out = self._forward(model, tiles.to(model.device), profile, generator).cpu()
+
+            for (y, x), t in zip(chunk, out):
+                acc[:, y:y + th, x:x + tw] += t * weight
+                norm[:, y:y + th, x:x + tw] += weight
+
+        return (acc / norm).unsqueeze(0)
+
+    # ------------------------------------------------
+    # Inference
+    # ------------------------------------------------
+
+    def deblur(self, img: np.ndarray, profile: str = DEFAULT_PROFILE,
+               tile=None, overlap=None, tile_batch=None) -> np.ndarray:
+        """
+        Args:
+            img: uint8 BGR image (H, W, 3)
+            tile: tile side in px (multiple of 8); None → auto,
+                  0 → always whole-image
+        Returns:
+            uint8 BGR image, same size
+        """
+        from basicsr.utils import img2tensor, tensor2img
+
+        if img is None or img.ndim != 3:
+            raise ValueError("HI-Diff expects a BGR image (H, W, 3)")
+
+        model = self.get_model(profile)
+
+        tile = self.tile_size if tile is None else tile
+        overlap = self.tile_overlap if overlap is None else overlap
+        tile_batch = self.tile_batch if tile_batch is None else tile_batch
+
+        h, w = img.shape[:2]
+        use_tiles = bool(tile) and max(h, w) > tile
+
+        lq = img2tensor(img.astype(np.float32) / 255.0, bgr2rgb=True, float32=True).unsqueeze(0)
+
+        with self._lock, inference_context(model.device, self.precision):
+            generator = self._generator(model)
+
+            if use_tiles:
+                tile = max(8, tile // 8 * 8)
+                overlap = min(overlap, tile // 2)
+                out = self._forward_tiled(model, lq, profile, tile, overlap, tile_batch, generator)
+            else:
+                out = self._forward(model, lq.to(model.device), profile, generator).cpu()
+
+        return tensor2img([out])
+
+    # ------------------------------------------------
+    # ROI mode
+    # ------------------------------------------------
+
+    @staticmethod
+    def _merge_boxes(boxes):
+        """Union overlapping boxes so no pixel is restored twice."""
+        boxes = [list(b) for b in boxes]
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    a, b = boxes[i], boxes[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        boxes.pop(j)
+                        merged = True
+                        break
+                if merged:
+                    break
+        return boxes
+
+    def deblur_regions(self, img: np.ndarray, boxes, profile: str = DEFAULT_PROFILE,
+                       expand: float = ROI_EXPAND) -> np.ndarray:
+        """
+        Deblur only the given regions (e.g. QA face bboxes).
+
+        Boxes are expanded for context, reflect-padded to one common size,
+        run as a batch, then feather-blended back into a copy of img.
+        """
+        from basicsr.utils import img2tensor, tensor2img
+
+        h, w = img.shape[:2]
+
+        rois = []
+        for x1, y1, x2, y2 in boxes:
+            mx, my = int((x2 - x1) * expand), int((y2 - y1) * expand)
+            rx1, ry1 = max(0, int(x1) - mx), max(0, int(y1) - my)
+            rx2, ry2 = min(w, int(x2) + mx), min(h, int(y2) + my)
+            if rx2 - rx1 >= 16 and ry2 - ry1 >= 16:
+                rois.append((rx1, ry1, rx2, ry2))
+
+        rois = self._merge_boxes(rois)
+        if not rois:
+            return img.copy()
+
+        ph = max(y2 - y1 for _, y1, _, y2 in rois)
+        pw = max(x2 - x1 for x1, _, x2, _ in rois)
+        ph, pw = -(-ph // 8) * 8, -(-pw // 8) * 8
+
+        # One oversized ROI → fall back to tiled / whole-image path
+        if self.tile_size and max(ph, pw) > self.tile_size:
+            out = img.copy()
+            for x1, y1, x2, y2 in rois:
+                self._paste(out, self.deblur(img[y1:y2, x1:x2], profile), (x1, y1, x2, y2), expand)
+            return out
+
+        crops = []
+        for x1, y1, x2, y2 in rois:
+            crop = img[y1:y2, x1:x2]
+            crop = cv2.copyMakeBorder(
+                crop, 0, ph - crop.shape[0], 0, pw - crop.shape[1], cv2.BORDER_REFLECT_101
+            )
+            crops.append(img2tensor(crop.astype(np.float32) / 255.0, bgr2rgb=True, float32=True))
+
+        model = self.get_model(profile)
+        restored = []
+
+        with self._lock, inference_context(model.device, self.precision):
+            generator = self._generator(model)
+
+            for i in range(0, len(crops), self.tile_batch):
+                batch = torch.stack(crops[i:i + self.tile_batch]).to(model.device)
+                restored.extend(self._forward(model, batch, profile, generator).cpu())
+
+        out = img.copy()
+        for (x1, y1, x2, y2), t in zip(rois, restored):
+            patch = tensor2img([t])[:y2 - y1, :x2 - x1]
+            self._paste(out, patch, (x1, y1, x2, y2), expand)
+
+        return out
+
+    def _paste(self, canvas, patch, box, expand):
+        """Feather the patch edges into canvas (in place)."""
+        x1, y1, x2, y2 = box
+        ph, pw = patch.shape[:2]
+
+        # Blend across most of the added context band
+        band = max(1, int(min(ph, pw) * expand / (1 + 2 * expand) * 0.75))
+        ramp = np.arange(1, band + 1, dtype=np.float32) / (band + 1)
+
+        ay = np.ones(ph, dtype=np.float32)
+        ax = np.ones(pw, dtype=np.float32)
+
+        # No seam at the image border → only feather inner edges
+        if y1 > 0:
+            ay[:band] = ramp
+        if y2 < canvas.shape[0]:
+            ay[-band:] = np.minimum(ay[-band:], ramp[::-1])
+        if x1 > 0:
+            ax[:band] = ramp
+        if x2 < canvas.shape[1]:
+            ax[-band:] = np.minimum(ax[-band:], ramp[::-1])
+
+        alpha = np.outer(ay, ax)[..., None]
+
+        region = canvas[y1:y2, x1:x2].astype(np.float32)
+        blended = region * (1.0 - alpha) + patch.astype(np.float32) * alpha
+        canvas[y1:y2, x1:x2] = np.clip(blended, 0, 255).astype(np.uint8)
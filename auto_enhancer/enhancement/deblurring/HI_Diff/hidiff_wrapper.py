@@ -1,25 +1,25 @@
-import sys
 from pathlib import Path
-import os
-import shutil
-import subprocess
 import cv2
-from PIL import Image
 
 
 
 from utils.temp_manager import get_temp_subpath
 from utils.logger import get_logger, log_event
+from auto_enhancer.enhancement.deblurring.HI_Diff.hidiff_engine import (
+    HIDIFF_PROFILES,
+    get_hidiff_engine
+)
 LOG = get_logger()
 
 
 # ---------------- Configuration ---------------- #
 
-HI_DIFF_ROOT = Path(__file__).resolve().parent
-
-YAML_MILD   = HI_DIFF_ROOT / "options" / "test" / "RealBlur_J.yml"
-YAML_STRONG = HI_DIFF_ROOT / "options" / "test" / "RealBlur_J.yml"
-YAML_ULTRA  = HI_DIFF_ROOT / "options" / "test" / "RealBlur_J.yml"
+# strength → resident HI-Diff profile (cheaper schedule for medium blur)
+STRENGTH_PROFILES = {
+    "medium": "realblur",        # 8 steps
+    "high":   "realblur_full",   # 16 steps
+    "ultra":  "realblur_full",
+}
 
 
 class HiDiffWrapper:
@@ -28,17 +28,20 @@ class HiDiffWrapper:
 
     This class:
     ✔ Executes classical deblur (low)
-    ✔ Executes HI-Diff (medium / high / ultra)
+    ✔ Executes HI-Diff (medium / high / ultra) in-process
     ❌ Does NOT decide strength
     ❌ Does NOT analyze blur
     """
 
-    def __init__(self, silent=False):
+    def __init__(self, silent=False, device=None):
         self.silent = silent
 
-        for p in [YAML_MILD, YAML_STRONG, YAML_ULTRA]:
-            if not p.exists():
-                raise FileNotFoundError(f"YAML config not found: {p}")
+        for spec in HIDIFF_PROFILES.values():
+            if not spec["options"].exists():
+                raise FileNotFoundError(f"YAML config not found: {spec['options']}")
+
+        # Shared, resident model (built lazily on first HI-Diff call)
+        self.engine = get_hidiff_engine(device)
 
     # ------------------------------------------------
     # Internal logger
@@ -52,13 +55,17 @@ class HiDiffWrapper:
     # Classical micro deblur (LOW only)
     # ========================================================
 
+    @staticmethod
+    def _unsharp(img):
+        blur = cv2.GaussianBlur(img, (0, 0), 1.0)
+        return cv2.addWeighted(img, 1.4, blur, -0.4, 0)
+
     def _classical_deblur(self, input_img_path: str) -> str:
         img = cv2.imread(input_img_path)
         if img is None:
             raise ValueError("Failed to read image for classical deblur")
 
-        blur = cv2.GaussianBlur(img, (0, 0), 1.0)
-        sharp = cv2.addWeighted(img, 1.4, blur, -0.4, 0)
+        sharp = self._unsharp(img)
 
         out_path = get_temp_subpath("autoenhancement/blur") / Path(input_img_path).name
         cv2.imwrite(str(out_path), sharp)
@@ -66,91 +73,36 @@ class HiDiffWrapper:
         self._log("ENGINE", "Classical deblur applied (LOW)")
         return str(out_path)
 
-    # ========================================================
-    # HI-DIFF DATASET PREP
-    # ========================================================
-
-    def _create_temp_dataset(self, input_img_path: str) -> str:
-        input_path = Path(input_img_path)
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input image not found: {input_img_path}")
-
-        input_dir = get_temp_subpath("datasets/test/RealBlur_J/input")
-        target_dir = get_temp_subpath("datasets/test/RealBlur_J/target")
-
-        img_name = input_path.stem + ".png"
-        img = Image.open(input_path).convert("RGB")
-
-        img.save(input_dir / img_name)
-        img.save(target_dir / img_name)
-
-        return img_name
+    def preload_compiled(self) -> int:
+        """Warmup: load cached compiled graphs for every strength profile."""
+        return sum(self.engine.preload_compiled(p) for p in set(STRENGTH_PROFILES.values()))
 
     # ========================================================
-    # YAML PATCH
+    # ARRAY ENTRY (no disk round-trip)
     # ========================================================
 
-    def _create_temp_yaml(self, base_yaml: Path, temp_yaml_path: Path):
+    def deblur(self, img, strength="medium", faces=None, profile=None):
+        """
+        BGR ndarray in → deblurred BGR ndarray out.
+        faces: optional QA face dicts → only their (expanded) bboxes are run.
+        profile: explicit HIDIFF_PROFILES key, overrides the strength mapping.
+        """
+        if strength == "low":
+            return self._unsharp(img)
 
-        input_dir = get_temp_subpath("datasets/test/RealBlur_J/input")
-        target_dir = get_temp_subpath("datasets/test/RealBlur_J/target")
+        profile = profile or STRENGTH_PROFILES.get(strength, STRENGTH_PROFILES["ultra"])
 
-        input_path_str = str(input_dir).replace("\\", "/")
-        target_path_str = str(target_dir).replace("\\", "/")
+        boxes = [f["bbox"] for f in (faces or []) if f.get("bbox")]
+        if boxes:
+            return self.engine.deblur_regions(img, boxes, profile=profile)
 
-        with open(base_yaml, "r") as f:
-            lines = f.readlines()
-
-        new_lines = []
-        for line in lines:
-            if "dataroot_gt:" in line:
-                new_lines.append(f'    dataroot_gt: "{target_path_str}"\n')
-            elif "dataroot_lq:" in line:
-                new_lines.append(f'    dataroot_lq: "{input_path_str}"\n')
-            else:
-                new_lines.append(line)
-
-        with open(temp_yaml_path, "w") as f:
-            f.writelines(new_lines)
-
-    # ========================================================
-    # HI-DIFF EXECUTION
-    # ========================================================
-
-    def _run_hidiff(self, temp_yaml_path: Path):
-
-        test_script = HI_DIFF_ROOT / "test.py"
-        python_exe = sys.executable
-        cmd = [python_exe, str(test_script), "-opt", str(temp_yaml_path)]
-
-        self._log("ENGINE", "HI-DIFF inference started")
-        result = subprocess.run(
-            cmd,
-            cwd=str(HI_DIFF_ROOT),
-            capture_output=True,
-            text=True
-        )
-
-        print("\n[HI-DIFF STDOUT]")
-        print(result.stdout)
-
-        print("\n[HI-DIFF STDERR]")
-        print(result.stderr)
-
-        print("\n[HI-DIFF RETURN CODE]")
-        print(result.returncode)
-
-        if result.returncode != 0:
-            raise RuntimeError("HI-DIFF failed")
-
-
-        self._log("ENGINE", "HI-DIFF inference completed")
+        return self.engine.deblur(img, profile=profile)
 
     # ========================================================
     # MAIN ENTRY
     # ========================================================
 
-    def enhance(self, input_img_path: str, strength="medium", silent=False) -> str:
+    def enhance(self, input_img_path: str, strength="medium", silent=False, faces=None, profile=None) -> str:
         old = self.silent
         self.silent = silent or self.silent
 
@@ -162,36 +114,17 @@ class HiDiffWrapper:
                 return self._classical_deblur(input_img_path)
 
             # ---------- HI-DIFF ----------
-            if strength == "medium":
-                base_yaml = YAML_MILD
-            elif strength == "high":
-                base_yaml = YAML_STRONG
-            else:
-                base_yaml = YAML_ULTRA
-
-            img_name = self._create_temp_dataset(input_img_path)
-
-            temp_yaml = get_temp_subpath("config") / f"hidiff_{strength}.yml"
-            self._create_temp_yaml(base_yaml, temp_yaml)
-
-            self._run_hidiff(temp_yaml)
-
-            blur_folder = get_temp_subpath("autoenhancement/blur")
-            enhanced_output = blur_folder / img_name
-
-            original_output = (
-                HI_DIFF_ROOT
-                / "results"
-                / "test_HI_Diff_RealBlur_J"
-                / "visualization"
-                / "RealBlur_J"
-                / img_name
-            )
+            img = cv2.imread(input_img_path)
+            if img is None:
+                raise ValueError(f"Failed to read image for HI-DIFF: {input_img_path}")
 
-            if not original_output.exists():
-                raise FileNotFoundError(f"HI-DIFF output not found: {original_output}")
+            region = f"faces={len(faces)}" if faces else "full"
+            self._log("ENGINE", f"HI-DIFF inference started → region={region}")
+            restored = self.deblur(img, strength, faces=faces, profile=profile)
+            self._log("ENGINE", "HI-DIFF inference completed")
 
-            shutil.copy2(original_output, enhanced_output)
+            enhanced_output = get_temp_subpath("autoenhancement/blur") / (Path(input_img_path).stem + ".png")
+            cv2.imwrite(str(enhanced_output), restored)
 
             self._log("ENGINE", f"DEBLUR finished → strength={strength}")
             return str(enhanced_output)
@@ -1,11 +1,18 @@
 import os
+import threading
 import torch
 import cv2
+import numpy as np
 from basicsr.utils import img2tensor, tensor2img
 from basicsr.utils.download_util import load_file_from_url
+from facexlib.detection import init_detection_model
+from facexlib.parsing import init_parsing_model
 from facexlib.utils.face_restoration_helper import FaceRestoreHelper
 from torchvision.transforms.functional import normalize
 
+from core.inference_utils import resolve_precision, prepare_module, to_layout, inference_context
+from core.model_compiler import CompiledModule, weights_stamp
+
 from .archs.gfpgan_bilinear_arch import GFPGANBilinear
 from .archs.gfpganv1_arch import GFPGANv1
 from .archs.gfpganv1_clean_arch import GFPGANv1Clean
@@ -27,8 +34,111 @@ def ensure_weights_dir():
     os.makedirs(BASE_WEIGHTS_DIR, exist_ok=True)
 
 
+# ===============================================================
+# Batched restoration sizing
+# ===============================================================
+MAX_FACE_BATCH = 8
+CPU_FACE_BATCH = 2
+
+# Rough peak device memory per 512x512 face through the generator
+FACE_MEM_MB = {"fp32": 700, "bf16": 400, "fp16": 400}
+
+
+
+
+
+
+# ===============================================================
+# Lazy facexlib sub-models
+# The helper loads its own RetinaFace + ParseNet in __init__. With QA
+# landmarks the detector is never needed, and ParseNet only when
+# use_parse is on → defer both until first use.
+# ===============================================================
+class _LazyModel:
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def _get(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._factory()
+        return self._model
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._get()(*args, **kwargs)
+
+
+class _LazyFaceRestoreHelper(FaceRestoreHelper):
+    """
+    FaceRestoreHelper whose detector / parser load on first call.
+    Same setup as facexlib's __init__ minus the eager model loading;
+    facexlib's module is left untouched (other helpers unaffected).
+    """
+
+    def __init__(self, upscale_factor, face_size=512, crop_ratio=(1, 1),
+                 det_model='retinaface_resnet50', save_ext='png', template_3points=False,
+                 pad_blur=False, use_parse=False, device=None, model_rootpath=None):
+        self.template_3points = template_3points
+        self.upscale_factor = upscale_factor
+        self.crop_ratio = crop_ratio  # (h, w)
+        assert (self.crop_ratio[0] >= 1 and self.crop_ratio[1] >= 1), 'crop ration only supports >=1'
+        self.face_size = (int(face_size * self.crop_ratio[1]), int(face_size * self.crop_ratio[0]))
+
+        if self.template_3points:
+            self.face_template = np.array([[192, 240], [319, 240], [257, 371]])
+        else:
+            # standard 5 landmarks for FFHQ faces with 512 x 512
+            self.face_template = np.array([[192.98138, 239.94708], [318.90277, 240.1936], [256.63416, 314.01935],
+                                           [201.26117, 371.41043], [313.08905, 371.15118]])
+        self.face_template = self.face_template * (face_size / 512.0)
+        if self.crop_ratio[0] > 1:
+            self.face_template[:, 1] += face_size * (self.crop_ratio[0] - 1) / 2
+        if self.crop_ratio[1] > 1:
+            self.face_template[:, 0] += face_size * (self.crop_ratio[1] - 1) / 2
+        self.save_ext = save_ext
+        self.pad_blur = pad_blur
+        if self.pad_blur is True:
+            self.template_3points = False
+
+        self.all_landmarks_5 = []
+        self.det_faces = []
+        self.affine_matrices = []
+        self.inverse_affine_matrices = []
+        self.cropped_faces = []
+        self.restored_faces = []
+        self.pad_input_imgs = []
+
+        if device is None:
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        else:
+            self.device = device
+
+        self.face_det = _LazyModel(lambda: init_detection_model(
+            det_model, half=False, device=self.device, model_rootpath=model_rootpath))
+
+        self.use_parse = use_parse
+        self.face_parse = _LazyModel(lambda: init_parsing_model(
+            model_name='parsenet', device=self.device, model_rootpath=model_rootpath))
+
+
+class _GeneratorGraph(torch.nn.Module):
+    """Generator with fixed call options → single-input, traceable."""
 
+    def __init__(self, gfpgan):
+        super().__init__()
+        self.gfpgan = gfpgan
 
+    def forward(self, x):
+        return self.gfpgan(x, return_rgb=False)[0]
 
 
 class GFPGANer():
@@ -45,10 +155,14 @@ class GFPGANer():
         arch (str): The GFPGAN architecture. Option: clean | original. Default: clean.
         channel_multiplier (int): Channel multiplier for large networks of StyleGAN2. Default: 2.
         bg_upsampler (nn.Module): The upsampler for the background. Default: None.
+        precision (str): fp32 | bf16 | fp16 | auto, autocast for the generator only. Default: fp32.
+        channels_last (bool): NHWC weights / inputs for the generator. Default: False.
+        use_parse (bool): ParseNet mask for paste-back (loaded lazily). Default: True.
     """
 
     def __init__(self, model_path, upscale=2, arch='clean',
-                channel_multiplier=2, bg_upsampler=None, device=None):
+                channel_multiplier=2, bg_upsampler=None, device=None,
+                precision='fp32', channels_last=False, use_parse=True):
 
         ensure_weights_dir()   # ✅ ONLY created when GFPGAN is used
 
@@ -58,6 +172,8 @@ class GFPGANer():
 
         # initialize model
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu') if device is None else device
+        self.precision = resolve_precision(self.device, precision)
+        self.channels_last = channels_last
         # initialize the GFP-GAN
         if arch == 'clean':
             self.gfpgan = GFPGANv1Clean(
@@ -98,14 +214,14 @@ class GFPGANer():
         elif arch == 'RestoreFormer':
             from .archs.restoreformer_arch import RestoreFormer
             self.gfpgan = RestoreFormer()
-        # initialize face helper
-        self.face_helper = FaceRestoreHelper(
-            upscale,
+        # initialize face helper (detector / parser load on first use)
+        self.face_helper = _LazyFaceRestoreHelper(
+            upscale_factor=upscale,
             face_size=512,
             crop_ratio=(1, 1),
             det_model='retinaface_resnet50',
             save_ext='png',
-            use_parse=True,
+            use_parse=use_parse,
             device=self.device,
             model_rootpath=BASE_WEIGHTS_DIR  # ✅ use portable dir
         )
@@ -126,16 +242,93 @@ class GFPGANer():
         else:
             keyname = 'params'
         self.gfpgan.load_state_dict(loadnet[keyname], strict=True)
-        self.gfpgan.eval()
-        self.gfpgan = self.gfpgan.to(self.device)
+        self.gfpgan = prepare_module(self.gfpgan.to(self.device), self.channels_last)
+
+        # Optional compiled generator (eager unless core.model_compiler is enabled)
+        self.generator = CompiledModule(
+            f"gfpgan_{arch}", _GeneratorGraph(self.gfpgan), self.device,
+            self.precision, weights_stamp(model_path)
+        )
+
+    # ---------------------------------------------------------------
+    # Batched generator
+    # ---------------------------------------------------------------
+    def _batch_size(self):
+        if str(self.device).startswith('cuda'):
+            free, _ = torch.cuda.mem_get_info()
+            fit = int(free * 0.8 // (FACE_MEM_MB.get(self.precision, 700) * 1024 ** 2))
+            return max(1, min(MAX_FACE_BATCH, fit))
+        return CPU_FACE_BATCH
+
+    def _restore_batch(self, faces):
+        """Aligned 512x512 BGR faces → restored faces, one generator call per batch."""
+        tensors = []
+        for face in faces:
+            t = img2tensor(face / 255., bgr2rgb=True, float32=True)
+            normalize(t, (0.5, 0.5, 0.5), (0.5, 0.5, 0.5), inplace=True)
+            tensors.append(t)
+
+        restored = []
+        batch = self._batch_size()
+        i = 0
+
+        while i < len(tensors):
+            chunk = to_layout(torch.stack(tensors[i:i + batch]).to(self.device), self.channels_last)
+            try:
+                # autocast covers the generator only; detection / parsing stay fp32
+                with inference_context(self.device, self.precision):
+                    output = self.generator(chunk).float()
+            except RuntimeError as error:
+                if batch > 1 and 'out of memory' in str(error):
+                    # OOM → retry the same faces with half the batch
+                    torch.cuda.empty_cache()
+                    batch //= 2
+                    continue
+                print(f'\tFailed inference for GFPGAN: {error}.')
+                restored.extend(faces[i:i + batch])
+                i += batch
+                continue
+
+            for out in output:
+                restored.append(tensor2img(out, rgb2bgr=True, min_max=(-1, 1)).astype('uint8'))
+            i += batch
+
+        return restored
+
+    def _keep_faces(self, keep):
+        """Drop filtered faces from every per-face list of the helper."""
+        helper = self.face_helper
+        n = len(helper.cropped_faces)
+        for attr in ('cropped_faces', 'affine_matrices', 'all_landmarks_5', 'det_faces'):
+            items = getattr(helper, attr, None)
+            if items is not None and len(items) == n:
+                setattr(helper, attr, [items[i] for i in keep])
 
     @torch.no_grad()
-    def enhance(self, img, has_aligned=False, only_center_face=False, paste_back=True, weight=0.5):
+    def enhance(self, img, has_aligned=False, only_center_face=False, paste_back=True, weight=0.5,
+                face_gate=None, landmarks=None):
+        """
+        face_gate (callable): (index, aligned_face) → blend alpha, called
+            before inference. 0 / False → face is neither restored nor pasted
+            back; 0 < alpha < 1 → restored face is alpha-blended with the
+            aligned crop in memory before paste-back; True / 1 → as is.
+        landmarks (list): precomputed 5-point landmarks per face (5x2, image
+            coords, facexlib order) → the internal detector is skipped.
+        """
         self.face_helper.clean_all()
 
         if has_aligned:  # the inputs are already aligned
             img = cv2.resize(img, (512, 512))
             self.face_helper.cropped_faces = [img]
+        elif landmarks is not None:
+            self.face_helper.read_image(img)
+            for lm in landmarks:
+                lm = np.asarray(lm, dtype=np.float32).reshape(5, 2)
+                # same gate as get_face_landmarks_5(eye_dist_threshold=5)
+                if np.linalg.norm(lm[0] - lm[1]) < 5:
+                    continue
+                self.face_helper.all_landmarks_5.append(lm)
+            self.face_helper.align_warp_face()
         else:
             self.face_helper.read_image(img)
             # get face landmarks for each face
@@ -145,23 +338,21 @@ class GFPGANer():
             # align and warp each face
             self.face_helper.align_warp_face()
 
-        # face restoration
-        for cropped_face in self.face_helper.cropped_faces:
-            # prepare data
-            cropped_face_t = img2tensor(cropped_face / 255., bgr2rgb=True, float32=True)
-            normalize(cropped_face_t, (0.5, 0.5, 0.5), (0.5, 0.5, 0.5), inplace=True)
-            cropped_face_t = cropped_face_t.unsqueeze(0).to(self.device)
-
-            try:
-                output = self.gfpgan(cropped_face_t, return_rgb=False, weight=weight)[0]
-                # convert to image
-                restored_face = tensor2img(output.squeeze(0), rgb2bgr=True, min_max=(-1, 1))
-            except RuntimeError as error:
-                print(f'\tFailed inference for GFPGAN: {error}.')
-                restored_face = cropped_face
+        alphas = [1.0] * len(self.face_helper.cropped_faces)
+        if face_gate is not None:
+            gates = [float(face_gate(i, face)) for i, face in enumerate(self.face_helper.cropped_faces)]
+            keep = [i for i, a in enumerate(gates) if a > 0]
+            self._keep_faces(keep)
+            alphas = [min(1.0, gates[i]) for i in keep]
+            if not keep:
+                return [], [], None
 
-            restored_face = restored_face.astype('uint8')
-            self.face_helper.add_restored_face(restored_face)
+        # face restoration (all faces batched; clean arch ignores `weight`)
+        restored = self._restore_batch(self.face_helper.cropped_faces)
+        for crop, face, alpha in zip(self.face_helper.cropped_faces, restored, alphas):
+            if alpha < 1.0:
+                face = cv2.addWeighted(face, alpha, crop, 1.0 - alpha, 0)
+            self.face_helper.add_restored_face(face)
 
         if not has_aligned and paste_back:
             # upsample the background
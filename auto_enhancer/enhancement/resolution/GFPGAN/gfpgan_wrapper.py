@@ -25,6 +25,7 @@ if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
 from auto_enhancer.enhancement.resolution.GFPGAN.gfpgan import GFPGANer
+from core.inference_utils import DEFAULT_PRECISION
 
 
 
@@ -43,7 +44,8 @@ class GFPGANWrapper:
     • No beautification
     """
 
-    def __init__(self, model_version='1.3', upscale=2, only_center_face=False):
+    def __init__(self, model_version='1.3', upscale=2, only_center_face=False,
+                 precision=DEFAULT_PRECISION, channels_last=False, use_parse=True):
         self.upscale = upscale
         self.only_center_face = only_center_face
 
@@ -69,8 +71,36 @@ class GFPGANWrapper:
             arch='clean',
             channel_multiplier=2,
             bg_upsampler=None,
-            device=self.device
+            device=self.device,
+            precision=precision,
+            channels_last=channels_last,
+            use_parse=use_parse
         )
+        LOG.info(f"[GFPGAN] Precision → {self.restorer.precision} | channels_last={channels_last}")
+
+    def preload_compiled(self):
+        """Warmup: load cached compiled generator graphs."""
+        return self.restorer.generator.preload()
+
+    # ---------------- UPSTREAM LANDMARKS ----------------
+    _LANDMARK_KEYS = ("left_eye", "right_eye", "nose", "mouth_left", "mouth_right")
+
+    def _qa_landmarks(self, faces):
+        """
+        QA face dicts → list of 5x2 landmark arrays (facexlib order).
+        None if any face lacks landmarks → caller falls back to detection.
+        """
+        out = []
+        for face in faces:
+            lm = face.get("landmarks")
+            if isinstance(lm, dict):
+                if not all(k in lm for k in self._LANDMARK_KEYS):
+                    return None
+                lm = [lm[k] for k in self._LANDMARK_KEYS]
+            if lm is None or np.asarray(lm).size != 10:
+                return None
+            out.append(np.asarray(lm, dtype=np.float32).reshape(5, 2))
+        return out
 
     # ---------------- QA ----------------
     def _lap_var(self, gray):
@@ -121,7 +151,11 @@ class GFPGANWrapper:
 
 
     # ---------------- MAIN ----------------
-    def enhance_image(self, img_path, output_dirs):
+    def enhance_image(self, img_path, output_dirs, faces=None):
+        """
+        faces: QA face dicts for this exact image. With landmarks on every
+        face, GFPGAN aligns from them and its own detector never runs.
+        """
 
         img_name = os.path.basename(img_path)
         basename, _ = os.path.splitext(img_name)
@@ -135,38 +169,42 @@ class GFPGANWrapper:
 
         LOG.info(f"[GFPGAN] Processing {img_name}")
 
-        cropped_faces, restored_faces, restored_img = self.restorer.enhance(
-            input_img,
-            has_aligned=False,
-            only_center_face=self.only_center_face,
-            paste_back=True,
-            weight=0.4  # temporary, will override logic by gating
-        )
+        landmarks = self._qa_landmarks(faces) if faces is not None else None
+        if landmarks is not None:
+            LOG.info(f"[GFPGAN] Using {len(landmarks)} upstream landmark set(s) — detector skipped")
 
-        final_img = input_img.copy()
-        any_used = False
-
-        for idx, (crop, restored) in enumerate(zip(cropped_faces, restored_faces)):
+        # ---------- Severity on aligned crops BEFORE inference ----------
+        # good → never reaches the generator; high / extreme → restored and
+        # alpha-blended with the crop in memory, then pasted back
+        levels = []
 
+        def face_gate(idx, crop):
             gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
             h, w = gray.shape
-
-            lap = self._lap_var(gray)
-            noise = self._estimate_noise(gray)
             level = self._classify_face(gray)
 
-            LOG.info(f"[GFPGAN][QA] Face {idx} {w}x{h} | blur={lap:.1f} | noise={noise:.2f} → {level.upper()}")
+            LOG.info(f"[GFPGAN][QA] Face {idx} {w}x{h} → {level.upper()}")
 
             if level == "good":
                 LOG.info(f"[GFPGAN] Face {idx} skipped")
-                continue
+                return 0.0
 
-            any_used = True
-            alpha = self._weight_map(level)
+            levels.append((idx, level))
+            return self._weight_map(level)
+
+        cropped_faces, restored_faces, restored_img = self.restorer.enhance(
+            input_img,
+            has_aligned=False,
+            only_center_face=self.only_center_face,
+            paste_back=True,
+            face_gate=face_gate,
+            landmarks=landmarks
+        )
 
-            restored = cv2.resize(restored, (crop.shape[1], crop.shape[0]))
-            blended = cv2.addWeighted(restored, alpha, crop, 1 - alpha, 0)
+        any_used = bool(restored_faces)
 
+        # Forensic trail: aligned crop + the blended face that was pasted
+        for (idx, level), crop, blended in zip(levels, cropped_faces, restored_faces):
             imwrite(crop, os.path.join(output_dirs['restored_faces'], f"{basename}_{idx:02d}_crop.png"))
             imwrite(blended, os.path.join(output_dirs['restored_faces'], f"{basename}_{idx:02d}_{level}.png"))
 
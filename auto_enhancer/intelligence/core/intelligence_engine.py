@@ -75,6 +75,10 @@ class IntelligenceEngine:
         self.log.info(
             f"[INTELLIGENCE] Face usability : {scores.face_usability:.3f} | level={face_lvl}"
         )
+        if scores.face_perceptual_score is not None:
+            self.log.info(
+                f"[INTELLIGENCE] Face CLIP-IQA  : {scores.face_perceptual_score:.3f}"
+            )
         self.log.info(
             f"[INTELLIGENCE] Overall        : {scores.overall_quality:.3f} | level={overall_lvl}"
         )
@@ -1,6 +1,6 @@
 import math
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 
 # ============================================================
@@ -22,6 +22,9 @@ class QualityScores:
 
     overall_quality: float
 
+    # CLIP-IQA of the largest face crop (QA clip_mode="faces"), else None
+    face_perceptual_score: Optional[float] = None
+
     def to_dict(self):
         return self.__dict__
 
@@ -49,6 +52,7 @@ class ScoreBuilder:
         obj = data.get("objective", {})
         faces = data.get("faces", {})
         perc = data.get("perceptual", {})
+        tiers = data.get("tiers", {}) or {}
 
         # =====================================================
         # FACE-FIRST SHARPNESS
@@ -88,6 +92,12 @@ class ScoreBuilder:
         contrast = self._score_contrast(contrast_std)
         resolution = self._score_resolution(width, height)
         perceptual = self._clamp(perc.get("clip_iqa_score", 0.5))
+        # Tiered QA skipped CLIP on purpose → not fused; any other missing
+        # CLIP fact (model unavailable) keeps the neutral 0.5 baseline
+        has_perceptual = (
+            "clip_iqa_score" in perc
+            or tiers.get("perceptual") != "skipped"
+        )
 
         # =====================================================
         # FACE USABILITY
@@ -96,6 +106,9 @@ class ScoreBuilder:
         face_present = faces.get("detected", False)
         face_usability, largest_ratio = self._score_faces(faces)
 
+        face_clip = face_block.get("clip_iqa_score")
+        face_perceptual = self._clamp(face_clip) if face_clip is not None else None
+
         # =====================================================
         # OVERALL FUSION
         # =====================================================
@@ -106,9 +119,8 @@ class ScoreBuilder:
             brightness,
             contrast,
             resolution,
-            perceptual,
             face_usability
-        ])
+        ] + ([perceptual] if has_perceptual else []))
 
         return QualityScores(
             sharpness_score=sharpness,
@@ -120,7 +132,8 @@ class ScoreBuilder:
             face_present=face_present,
             face_usability=face_usability,
             largest_face_ratio=largest_ratio,
-            overall_quality=overall
+            overall_quality=overall,
+            face_perceptual_score=face_perceptual
         )
 
     # ============================================================
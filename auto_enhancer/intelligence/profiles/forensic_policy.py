@@ -35,6 +35,16 @@ class ForensicPolicyEngine:
     def __init__(self):
         self.SAFE_QUALITY = 0.78
         self.MODERATE_QUALITY = 0.55
+        self.ROI_DEBLUR_MAX_FACE_RATIO = 0.25
+        # Face crop already perceptually good → skip face-only heavy models
+        self.GOOD_FACE_PERCEPTUAL = 0.70
+        self.POSE_ROLL_TRIGGER = 7
+        self.DEBLUR_MAX_SHARPNESS = 0.72
+
+        # Tiered QA: cheap facts inside these bands are re-measured
+        # by the heavy models (FAN / CLIP) before a decision is made
+        self.ROLL_UNCERTAINTY = 2.0        # degrees around POSE_ROLL_TRIGGER
+        self.QUALITY_UNCERTAINTY = 0.05    # around SAFE / MODERATE cut-offs
         self.learned_policy = self._load_learned_policy()
 
     def evaluate(self, scores: QualityScores, qa_results: dict) -> ForensicDecision:
@@ -68,7 +78,7 @@ class ForensicPolicyEngine:
         if worst_roll is not None:
             R = abs(worst_roll)
 
-            if R >= 7:
+            if R >= self.POSE_ROLL_TRIGGER:
                 actions.append({"type": "pose", "priority": 0})
 
         # =================================================
@@ -136,6 +146,11 @@ class ForensicPolicyEngine:
                 }
             })
 
+        face_good = (
+            scores.face_perceptual_score is not None
+            and scores.face_perceptual_score >= self.GOOD_FACE_PERCEPTUAL
+        )
+
         # =================================================
         # 5. BLUR HANDLING
         # =================================================
@@ -148,17 +163,30 @@ class ForensicPolicyEngine:
             strength = "high"
         elif s < 0.60:
             strength = "medium"
-        elif s < 0.72:
+        elif s < self.DEBLUR_MAX_SHARPNESS:
             strength = "low"
         else:
             strength = None
 
         if strength:
-            actions.append({
-                "type": "deblur",
-                "strength": strength,
-                "priority": 2
-            })
+            # Faces are a small part of the frame → restore only them
+            region = (
+                "faces"
+                if scores.face_present and scores.largest_face_ratio < self.ROI_DEBLUR_MAX_FACE_RATIO
+                else "full"
+            )
+
+            if region == "faces" and face_good:
+                notes.append(
+                    f"Face ROI deblur skipped → face CLIP-IQA {scores.face_perceptual_score:.2f}"
+                )
+            else:
+                actions.append({
+                    "type": "deblur",
+                    "strength": strength,
+                    "region": region,
+                    "priority": 2
+                })
 
         # =================================================
         # 6. SUPER RESOLUTION (GFPGAN GATED)
@@ -166,10 +194,15 @@ class ForensicPolicyEngine:
 
         if scores.face_present:
             if scores.sharpness_score <= 0.50 and scores.largest_face_ratio > 0.10:
-                actions.append({
-                    "type": "super_resolution",
-                    "priority": 5
-                })
+                if face_good:
+                    notes.append(
+                        f"Super resolution skipped → face CLIP-IQA {scores.face_perceptual_score:.2f}"
+                    )
+                else:
+                    actions.append({
+                        "type": "super_resolution",
+                        "priority": 5
+                    })
 
         # =================================================
         # 7. NOISE REDUCTION
@@ -200,6 +233,33 @@ class ForensicPolicyEngine:
 
 
 
+    # ============================================================
+    # TIERED QA ESCALATION
+    # Cheap-tier facts → does a heavy model change the decision?
+    # ============================================================
+
+    def needs_fine_pose(self, roll_abs: Optional[float], face_present: bool) -> bool:
+        """FAN only when the 5-pt roll sits near the pose trigger (or is missing)."""
+        if not face_present:
+            return False
+        if roll_abs is None:
+            return True
+        return abs(roll_abs - self.POSE_ROLL_TRIGGER) <= self.ROLL_UNCERTAINTY
+
+    def needs_perceptual(self, scores: QualityScores) -> bool:
+        """
+        CLIP only when its score can move the decision:
+        • face-only SR / ROI deblur is on the table (face CLIP gate)
+        • overall quality is near a risk cut-off
+        """
+        if scores.face_present and scores.sharpness_score < self.DEBLUR_MAX_SHARPNESS:
+            return True
+
+        return any(
+            abs(scores.overall_quality - cut) <= self.QUALITY_UNCERTAINTY
+            for cut in (self.SAFE_QUALITY, self.MODERATE_QUALITY)
+        )
+
     # ============================================================
     # CATEGORY HELPERS
     # Used only for logging & learner
@@ -84,8 +84,8 @@ class FaceAlignment:
             network_name = '2DFAN-' + str(network_size)
         else:
             network_name = '3DFAN-' + str(network_size)
-        self.face_alignment_net = torch.jit.load(
-            load_file_from_url(models_urls.get(pytorch_version, default_model_urls)[network_name]))
+        self.network_path = load_file_from_url(models_urls.get(pytorch_version, default_model_urls)[network_name])
+        self.face_alignment_net = torch.jit.load(self.network_path)
 
         self.face_alignment_net.to(device, dtype=dtype)
         self.face_alignment_net.eval()
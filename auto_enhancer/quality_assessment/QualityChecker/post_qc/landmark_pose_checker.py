@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+from utils.paths import ROOT_DIR
+from utils.logger import get_logger
+LOG = get_logger()
+
+# Written by tuning/calibrate_pose_backends.py (linear map PnP → FAN angles)
+POSE_CALIBRATION_PATH = ROOT_DIR / "tuning" / "pose_calibration.json"
+
+# Canonical 5-pt face (mm, camera axes: x right, y down, z away from camera)
+_MODEL_POINTS = np.array([
+    [-31.0, -32.0,   0.0],    # left_eye   (image left)
+    [ 31.0, -32.0,   0.0],    # right_eye
+    [  0.0,   0.0, -28.0],    # nose tip
+    [-24.0,  30.0,  -8.0],    # mouth_left
+    [ 24.0,  30.0,  -8.0],    # mouth_right
+], dtype=np.float64)
+
+_LANDMARK_KEYS = ("left_eye", "right_eye", "nose", "mouth_left", "mouth_right")
+
+
+class LandmarkPoseChecker:
+    """
+    5-pt PnP pose checker (FACTS ONLY)
+
+    ✔ yaw / pitch / roll from RetinaFace's 5-pt landmarks (solvePnP)
+    ✔ No network, no crops → near-zero cost
+    ✔ Same fact layout as FANPoseChecker (drop-in pose backend)
+    ✔ Optional calibration → angles on FAN's scale
+    ❌ Landmarks are not refined (upstream 5-pt kept)
+    """
+
+    SOURCE = "PnP5"
+
+    def __init__(self, calibration_path=POSE_CALIBRATION_PATH, verbose=False):
+        self.verbose = verbose
+        self.calibration = self._load_calibration(calibration_path)
+
+    # ============================================================
+    # Public API
+    # ============================================================
+
+    def analyze_faces(self, image, boxes, landmarks=None):
+        """
+        Args:
+            image (np.ndarray): only its size is used (camera model)
+            boxes (list): one per face (kept for backend parity)
+            landmarks (list): 5-pt landmark dict per face
+
+        Returns:
+            list aligned with boxes: {"yaw", "pitch", "roll"} or None
+        """
+        landmarks = landmarks or [None] * len(boxes)
+        h, w = image.shape[:2]
+
+        return [self.estimate(lm, w, h) for lm in landmarks]
+
+    def estimate(self, landmarks, width, height, calibrated=True):
+        if not isinstance(landmarks, dict) or any(landmarks.get(k) is None for k in _LANDMARK_KEYS):
+            return None
+
+        pts = np.array([landmarks[k][:2] for k in _LANDMARK_KEYS], dtype=np.float64)
+
+        # Eyes collapsed → no usable geometry
+        if np.linalg.norm(pts[1] - pts[0]) < 2.0:
+            return None
+
+        focal = float(max(width, height))
+        camera = np.array([
+            [focal, 0.0, width / 2.0],
+            [0.0, focal, height / 2.0],
+            [0.0, 0.0, 1.0]
+        ], dtype=np.float64)
+
+        ok, rvec, tvec = cv2.solvePnP(_MODEL_POINTS, pts, camera, None, flags=cv2.SOLVEPNP_EPNP)
+        if not ok:
+            return None
+
+        ok, rvec, tvec = cv2.solvePnP(
+            _MODEL_POINTS, pts, camera, None, rvec, tvec,
+            useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE
+        )
+        if not ok:
+            return None
+
+        yaw, pitch, roll = self._euler(cv2.Rodrigues(rvec)[0])
+
+        if calibrated:
+            yaw = self._calibrate("yaw", yaw)
+            pitch = self._calibrate("pitch", pitch)
+            roll = self._calibrate("roll", roll)
+
+        if self.verbose:
+            LOG.info(f"[PnP5] yaw={yaw:.2f}, pitch={pitch:.2f}, roll={roll:.2f}")
+
+        return {
+            "yaw": round(float(yaw), 2),
+            "pitch": round(float(pitch), 2),
+            "roll": round(float(roll), 2)
+        }
+
+    # ============================================================
+    # Math
+    # ============================================================
+
+    def _euler(self, R):
+        """
+        R = Rz(roll) · Ry(yaw) · Rx(pitch), image axes.
+        Signs follow FANPoseChecker: roll > 0 → right eye lower,
+        yaw > 0 → nose right of the eyes, pitch > 0 → nose lower.
+        """
+        beta = np.arcsin(np.clip(-R[2, 0], -1.0, 1.0))
+        alpha = np.arctan2(R[2, 1], R[2, 2])
+        gamma = np.arctan2(R[1, 0], R[0, 0])
+
+        return -np.degrees(beta), np.degrees(alpha), np.degrees(gamma)
+
+    def _calibrate(self, axis, value):
+        a, b = self.calibration.get(axis, (1.0, 0.0))
+        return a * value + b
+
+    def _load_calibration(self, path):
+        path = Path(path) if path else None
+        if path is None or not path.exists():
+            return {}
+
+        try:
+            data = json.loads(path.read_text())
+            calib = {k: (float(v["a"]), float(v["b"])) for k, v in data.get("fit", {}).items()}
+            LOG.info(f"[PnP5] Pose calibration loaded → {path.name}")
+            return calib
+        except Exception as e:
+            LOG.info(f"[PnP5] Pose calibration unreadable → {e}")
+            return {}
@@ -1,9 +1,16 @@
 import numpy as np
 import torch
 from auto_enhancer.quality_assessment.QualityChecker.post_qc.FAN.face_alignment.api import FaceAlignment, LandmarksType
+from auto_enhancer.quality_assessment.QualityChecker.post_qc.FAN.face_alignment.utils import (
+    crop, flip, get_image, get_preds_fromhm
+)
+from core.model_compiler import CompiledModule, weights_stamp
 from utils.logger import get_logger
 LOG = get_logger()
 
+# Face crops per FAN forward pass
+FAN_BATCH = 8
+
 
 
 class FANPoseChecker:
@@ -17,19 +24,32 @@ class FANPoseChecker:
     ✔ Returns yaw / pitch / roll facts
     """
 
+    SOURCE = "FAN"
+
     def __init__(self, device=None, verbose=False):
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
         self.verbose = verbose
         self.fa = FaceAlignment(LandmarksType.TWO_D, device=self.device)
 
+        # Scripted FAN → frozen / fused graph per batch bucket (when compiling is on)
+        self.fa.face_alignment_net = CompiledModule(
+            "fan2d", self.fa.face_alignment_net, self.device, stamp=weights_stamp(self.fa.network_path)
+        )
+
+    def preload_compiled(self):
+        """Warmup: load cached compiled FAN graphs."""
+        return self.fa.face_alignment_net.preload()
+
     # ============================================================
     # Public API
     # ============================================================
 
-    def analyze(self, image):
+    def analyze(self, image, detected_faces=None):
         """
         Args:
             image (np.ndarray)
+            detected_faces (list): [x1, y1, x2, y2] boxes from an upstream
+                detector → FAN's own SFD pass is skipped
 
         Returns:
             dict:
@@ -44,14 +64,76 @@ class FANPoseChecker:
                 }
         """
 
-        landmarks = self.fa.get_landmarks_from_image(image)
+        landmarks = self.fa.get_landmarks_from_image(image, detected_faces=detected_faces)
 
         if landmarks is None or len(landmarks) == 0:
             if self.verbose:
                 LOG.info("[FAN] No face detected")
             return None
 
-        pts = np.array(landmarks[0])  # (68,2)
+        return self._pose_from_points(np.array(landmarks[0]))
+
+    def analyze_faces(self, image, boxes, landmarks=None):
+        """
+        Pose for EVERY box in one batched FAN forward pass.
+
+        Args:
+            image (np.ndarray)
+            boxes (list): [x1, y1, x2, y2] per face (upstream detector)
+            landmarks: unused (backend parity with LandmarkPoseChecker)
+
+        Returns:
+            list aligned with boxes: analyze()-style dict per face
+        """
+        if not boxes:
+            return []
+
+        image = get_image(image)
+        ref = self.fa.face_detector.reference_scale
+
+        crops, centers, scales = [], [], []
+        for d in boxes:
+            # Same crop geometry as FaceAlignment.get_landmarks_from_image
+            center = np.array([d[2] - (d[2] - d[0]) / 2.0, d[3] - (d[3] - d[1]) / 2.0])
+            center[1] = center[1] - (d[3] - d[1]) * 0.12
+            scale = (d[2] - d[0] + d[3] - d[1]) / ref
+
+            crops.append(crop(image, center, scale).transpose((2, 0, 1)))
+            centers.append(center)
+            scales.append(scale)
+
+        heatmaps = []
+        for start in range(0, len(crops), FAN_BATCH):
+            heatmaps.append(self._forward(np.stack(crops[start:start + FAN_BATCH])))
+        heatmaps = np.concatenate(heatmaps)
+
+        results = []
+        for hm, center, scale in zip(heatmaps, centers, scales):
+            _, pts_img, _ = get_preds_fromhm(hm[None], center, scale)
+            results.append(self._pose_from_points(pts_img.reshape(68, 2)))
+
+        return results
+
+    def _forward(self, batch):
+        n = len(batch)
+
+        # Compiled graphs are keyed by shape → pad the batch to a power of two
+        if self.fa.face_alignment_net.compiler.enabled:
+            padded = 1 << (n - 1).bit_length()
+            if padded > n:
+                batch = np.concatenate([batch, np.zeros((padded - n,) + batch.shape[1:], batch.dtype)])
+
+        inp = torch.from_numpy(batch).to(self.device, dtype=self.fa.dtype).div_(255.0)
+
+        with torch.no_grad():
+            out = self.fa.face_alignment_net(inp).detach()
+            if self.fa.flip_input:
+                out += flip(self.fa.face_alignment_net(flip(inp)).detach(), is_label=True)
+
+        return out[:n].to(device="cpu", dtype=torch.float32).numpy()
+
+    def _pose_from_points(self, pts):
+        """yaw / pitch / roll + derived 5-pt landmarks from 68 FAN points."""
 
         # ---------- Extract stable keypoints ----------
         left_eye = np.mean(pts[36:42], axis=0)
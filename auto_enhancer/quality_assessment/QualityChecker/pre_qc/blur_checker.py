@@ -3,6 +3,7 @@
 import cv2
 import numpy as np
 from utils.logger import get_logger
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
 LOG = get_logger()
 
 
@@ -28,32 +29,25 @@ class BlurChecker:
     # Core metrics
     # --------------------------------------------------
 
-    def _laplacian_var(self, gray):
-        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    def _laplacian_var(self, ctx):
+        return ctx.laplacian_var
 
-    def _tenengrad(self, gray):
-        gx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        gy = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        mag = gx * gx + gy * gy
-        return float(np.mean(mag))
+    def _tenengrad(self, ctx):
+        return ctx.tenengrad
 
-    def _edge_density(self, gray):
-        edges = cv2.Canny(gray, 80, 160)
-        return float(np.count_nonzero(edges) / edges.size)
+    def _edge_density(self, ctx):
+        return ctx.edge_density(80, 160)
 
     # --------------------------------------------------
     # Main QA entry
     # --------------------------------------------------
 
-    def check(self, image):
-        if not isinstance(image, np.ndarray):
-            raise TypeError("Input must be a numpy.ndarray.")
+    def check(self, image, ctx=None):
+        ctx = ctx or ImageFeatureContext(image)
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
-
-        lap_var = self._laplacian_var(gray)
-        tenengrad = self._tenengrad(gray)
-        edge_density = self._edge_density(gray)
+        lap_var = self._laplacian_var(ctx)
+        tenengrad = self._tenengrad(ctx)
+        edge_density = self._edge_density(ctx)
 
         # Basic boolean gate (for legacy compatibility)
         status = lap_var >= self.threshold
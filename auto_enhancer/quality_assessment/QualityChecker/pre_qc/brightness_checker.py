@@ -3,6 +3,7 @@
 import cv2
 import numpy as np
 from utils.logger import get_logger
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
 LOG = get_logger()
 
 class BrightnessChecker:
@@ -11,24 +12,23 @@ class BrightnessChecker:
         self.threshold = threshold
         self.verbose = verbose
 
-    def check(self, image):
+    def check(self, image, ctx=None):
         """
         Check if image brightness is above threshold.
 
         Args:
             image (np.ndarray): Input BGR image.
+            ctx (ImageFeatureContext): shared per-image feature cache.
 
         Returns:
             tuple: (status, details)
                 - status = True if brightness is acceptable, False otherwise
                 - details = {"mean_intensity": float, "threshold": int}
         """
-        if not isinstance(image, np.ndarray):
-            raise TypeError("Input must be a numpy.ndarray.")
+        ctx = ctx or ImageFeatureContext(image)
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        mean_intensity = np.mean(gray)
-        std_intensity = float(np.std(gray))
+        mean_intensity = ctx.gray_mean
+        std_intensity = ctx.gray_std
         status = mean_intensity >= self.threshold
         details = {
             "mean_intensity": float(mean_intensity),
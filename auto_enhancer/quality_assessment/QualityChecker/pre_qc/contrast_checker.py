@@ -3,6 +3,7 @@
 import cv2
 import numpy as np
 from utils.logger import get_logger
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
 LOG = get_logger()
 
 
@@ -19,30 +20,28 @@ class ContrastChecker:
     def __init__(self, verbose=False):
         self.verbose = verbose
 
-    def check(self, image):
+    def check(self, image, ctx=None):
         """
         Analyze contrast properties of the image.
 
         Args:
             image (np.ndarray): Input BGR image.
+            ctx (ImageFeatureContext): shared per-image feature cache.
 
         Returns:
             tuple: (status, details)
                 - status  = always True (checker executed)
                 - details = contrast metrics
         """
-        if not isinstance(image, np.ndarray):
-            raise TypeError("Input must be a numpy.ndarray.")
+        ctx = ctx or ImageFeatureContext(image)
+        stats = ctx.gray_stats   # single histogram pass, shared with brightness
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        std = stats["std"]
+        mean = stats["mean"]
+        min_val = stats["min"]
+        max_val = stats["max"]
 
-        std = float(np.std(gray))
-        mean = float(np.mean(gray))
-        min_val = int(np.min(gray))
-        max_val = int(np.max(gray))
-
-        p5, p95 = np.percentile(gray, (5, 95))
-        spread = float(p95 - p5)
+        spread = float(ctx.gray_percentile(95) - ctx.gray_percentile(5))
 
         details = {
             "std_dev": std,
@@ -0,0 +1,106 @@
+# QualityChecker/pre_qc/feature_context.py
+
+import cv2
+import numpy as np
+
+from utils.image_stats import gray_histogram_stats
+
+
+class ImageFeatureContext:
+    """
+    Per-image feature cache shared by all pre-QC checkers.
+
+    ✔ Lazy: nothing is computed until a checker asks for it
+    ✔ Memoized: gray / Laplacian / Sobel / Canny / blurs computed once
+    ✔ Same OpenCV calls the checkers used before → identical facts
+    ❌ No thresholds / decisions
+    """
+
+    def __init__(self, image: np.ndarray):
+        if not isinstance(image, np.ndarray):
+            raise TypeError("Input must be a numpy.ndarray.")
+
+        self.image = image
+        self._cache = {}
+
+    def _memo(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    # --------------------------------------------------
+    # Base images
+    # --------------------------------------------------
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._memo(
+            "gray",
+            lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY) if self.image.ndim == 3 else self.image
+        )
+
+    def gaussian(self, ksize: int, color: bool = False) -> np.ndarray:
+        src = self.image if color else self.gray
+        return self._memo(("gauss", ksize, color), lambda: cv2.GaussianBlur(src, (ksize, ksize), 0))
+
+    # --------------------------------------------------
+    # Intensity statistics
+    # --------------------------------------------------
+
+    # Every intensity fact (mean / std / min / max / percentiles) comes
+    # from one 256-bin histogram → no full-image sort or repeated passes
+    STAT_PERCENTILES = (1, 5, 50, 95, 99)
+
+    @property
+    def gray_stats(self) -> dict:
+        return self._memo("gray_stats", lambda: gray_histogram_stats(self.gray, self.STAT_PERCENTILES))
+
+    @property
+    def gray_mean(self) -> float:
+        return self.gray_stats["mean"]
+
+    @property
+    def gray_std(self) -> float:
+        return self.gray_stats["std"]
+
+    def gray_percentile(self, q) -> float:
+        pct = self.gray_stats["percentiles"]
+        if q not in pct:
+            pct[q] = gray_histogram_stats(self.gray, (q,))["percentiles"][q]
+        return pct[q]
+
+    # --------------------------------------------------
+    # Gradients / edges
+    # --------------------------------------------------
+
+    @property
+    def laplacian_var(self) -> float:
+        return self._memo("lap_var", lambda: float(cv2.Laplacian(self.gray, cv2.CV_64F).var()))
+
+    @property
+    def sobel(self):
+        """(gx, gy) float64, ksize=3."""
+        return self._memo("sobel", lambda: (
+            cv2.Sobel(self.gray, cv2.CV_64F, 1, 0, ksize=3),
+            cv2.Sobel(self.gray, cv2.CV_64F, 0, 1, ksize=3)
+        ))
+
+    @property
+    def tenengrad(self) -> float:
+        def _calc():
+            gx, gy = self.sobel
+            return float(np.mean(gx * gx + gy * gy))
+        return self._memo("tenengrad", _calc)
+
+    def canny(self, low: int, high: int) -> np.ndarray:
+        return self._memo(("canny", low, high), lambda: cv2.Canny(self.gray, low, high))
+
+    def edge_density(self, low: int, high: int) -> float:
+        def _calc():
+            edges = self.canny(low, high)
+            return float(np.count_nonzero(edges) / edges.size)
+        return self._memo(("edge_density", low, high), _calc)
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 from utils.logger import get_logger
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
 LOG = get_logger()
 
 
@@ -22,35 +23,30 @@ class NoiseChecker:
     # Core metrics
     # ------------------------------------------------
 
-    def _estimate_noise(self, gray: np.ndarray) -> float:
+    def _estimate_noise(self, ctx: ImageFeatureContext) -> float:
         """
         Residual-based noise estimate.
         Higher = noisier.
         """
-        blur = cv2.GaussianBlur(gray, (5, 5), 0)
-        residual = cv2.absdiff(gray, blur)
+        residual = cv2.absdiff(ctx.gray, ctx.gaussian(5))
         return float(np.median(residual))
 
-    def _edge_density(self, gray: np.ndarray) -> float:
+    def _edge_density(self, ctx: ImageFeatureContext) -> float:
         """
         Structural complexity estimate.
         Used to protect edges from over-denoising.
         """
-        edges = cv2.Canny(gray, 80, 160)
-        return float(np.count_nonzero(edges) / edges.size)
+        return ctx.edge_density(80, 160)
 
     # ------------------------------------------------
     # Public API
     # ------------------------------------------------
 
-    def check(self, image: np.ndarray):
-        if not isinstance(image, np.ndarray):
-            raise TypeError("Input must be numpy.ndarray")
+    def check(self, image: np.ndarray, ctx: ImageFeatureContext = None):
+        ctx = ctx or ImageFeatureContext(image)
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        noise = self._estimate_noise(gray)
-        edges = self._edge_density(gray)
+        noise = self._estimate_noise(ctx)
+        edges = self._edge_density(ctx)
 
         details = {
             "noise": round(noise, 3),
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 from utils.logger import get_logger
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
 LOG = get_logger()
 
 class ResolutionChecker:
@@ -15,30 +16,31 @@ class ResolutionChecker:
         self.verbose = verbose
 
     # ---------- Helper Methods ----------
-    def _laplacian_variance(self, gray):
+    def _laplacian_variance(self, ctx):
         """Sharpness indicator."""
-        return cv2.Laplacian(gray, cv2.CV_64F).var()
+        return ctx.laplacian_var
 
-    def _estimate_psnr(self, image):
+    def _estimate_psnr(self, ctx):
         """Approximate PSNR to detect compression/noise."""
-        smoothed = cv2.GaussianBlur(image, (3, 3), 0)
+        image = ctx.image
+        smoothed = ctx.gaussian(3, color=True)
         mse = np.mean((image.astype(np.float32) - smoothed.astype(np.float32)) ** 2)
         if mse == 0:
             return 100.0
         return 10 * np.log10((255 ** 2) / mse)
 
-    def _edge_density(self, gray):
+    def _edge_density(self, ctx):
         """Texture/detail measure."""
-        edges = cv2.Canny(gray, 100, 200)
-        return np.sum(edges > 0) / edges.size
+        return ctx.edge_density(100, 200)
 
     # ---------- Core Check ----------
-    def check(self, image):
+    def check(self, image, ctx=None):
         """
         Check if the image resolution and quality are acceptable.
 
         Args:
             image (np.ndarray): Input BGR image.
+            ctx (ImageFeatureContext): shared per-image feature cache.
 
         Returns:
             tuple: (status, details)
@@ -46,19 +48,15 @@ class ResolutionChecker:
                 - details = {"width", "height", "min_width", "min_height",
                              "lap_var", "psnr", "edge_density", "trigger_score"}
         """
-        if not isinstance(image, np.ndarray):
-            raise TypeError("Input must be a numpy.ndarray.")
+        ctx = ctx or ImageFeatureContext(image)
 
         h, w = image.shape[:2]
         status = (w >= self.min_width) and (h >= self.min_height)
 
-        # --- Convert to grayscale for metric analysis ---
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # --- Hybrid Quality Metrics ---
-        lap_var = self._laplacian_variance(gray)
-        psnr = self._estimate_psnr(image)
-        edge_density = self._edge_density(gray)
+        # --- Hybrid Quality Metrics (gray / Laplacian shared via ctx) ---
+        lap_var = self._laplacian_variance(ctx)
+        psnr = self._estimate_psnr(ctx)
+        edge_density = self._edge_density(ctx)
 
         # --- Scoring Logic ---
         trigger_score = 0
@@ -0,0 +1,257 @@
+# auto_enhancer/quality_assessment/core/face_analysis.py
+
+import cv2
+import numpy as np
+
+from utils.logger import get_logger
+from core.gpu_lock import GPU_LOCK
+
+
+class FaceAnalysisStage:
+    """
+    Unified face-analysis stage (FACTS ONLY)
+
+    ✔ ONE full-image detection (RetinaFace, 5-pt landmarks)
+    ✔ Pose backend (FAN batch or 5-pt PnP) on ALL those boxes (no SFD pass)
+    ✔ Landmarks cached per face on the QA report
+      → PoseCorrector and GFPGAN reuse them, no re-detection
+    ✔ fine_pose=False → roll from the detector's 5-pt eyes only (cheap tier)
+    ❌ No decisions
+    """
+
+    def __init__(self, detector, mask_classifier, pose_checker):
+        self.detector = detector
+        self.mask_classifier = mask_classifier
+        self.pose_checker = pose_checker
+        self.log = get_logger()
+
+    # =========================================================
+    # MAIN ENTRY
+    # =========================================================
+    def run(self, img, fine_pose=True):
+
+        import torch
+
+        self.log.info("[FACE QC] Step 1: detector start")
+        if torch.cuda.is_available():
+            self.log.info(f"[GPU] Allocated: {torch.cuda.memory_allocated()/1e9:.2f} GB")
+
+        with GPU_LOCK:
+            detections = self.detector(img)
+
+        self.log.info(f"[FACE QC] Step 2: detector finished | faces={len(detections)}")
+
+        faces = self._face_facts(img, detections)
+
+        if fine_pose:
+            # Every face in one batched FAN pass
+            pose_facts = self._pose_facts(img, faces)
+        else:
+            # 5-pt roll for every face, aggregated like the FAN path
+            pose_facts = self._landmark_pose_facts(faces)
+
+        self.log.info(f"[FACE QC] Faces retained: {len(faces)}")
+
+        return {
+            "detected": len(faces) > 0,
+            "count": len(faces),
+            "faces": faces,
+            "largest_face": max(faces, key=lambda f: f["area_ratio"]) if faces else None,
+            "pose": pose_facts
+        }
+
+    # =========================================================
+    # PER-FACE FACTS
+    # =========================================================
+    def _face_facts(self, img, detections):
+
+        h, w = img.shape[:2]
+        img_area = h * w
+
+        faces = []
+
+        for det in detections:
+
+            x1, y1, x2, y2 = det["box"]
+
+            x1 = max(0, int(x1))
+            y1 = max(0, int(y1))
+            x2 = min(w, int(x2))
+            y2 = min(h, int(y2))
+
+            if x2 <= x1 or y2 <= y1:
+                continue
+
+            face = img[y1:y2, x1:x2]
+            if face.size == 0:
+                continue
+
+            fh, fw = face.shape[:2]
+            if fh < 10 or fw < 10:
+                continue
+
+            gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+
+            blur = cv2.Laplacian(gray, cv2.CV_64F).var()
+            brightness = gray.mean()
+
+            with GPU_LOCK:
+                label, conf = self.mask_classifier(face)
+
+            faces.append({
+                "bbox": [x1, y1, x2, y2],
+                "raw_bbox": list(det.get("raw_box") or det["box"]),
+                "width": fw,
+                "height": fh,
+                "area_ratio": round((fw * fh) / img_area, 4),
+                "blur_variance": round(float(blur), 2),
+                "brightness": round(float(brightness), 2),
+                "masked": label == "Mask",
+                "mask_conf": float(conf),
+                "landmarks": det.get("landmarks"),
+                "landmarks_source": "retinaface" if det.get("landmarks") else None,
+                "area": fw * fh
+            })
+
+        return faces
+
+    # =========================================================
+    # FAN ON SHARED BOXES
+    # =========================================================
+    def refine_pose(self, img, faces):
+        """FAN pose for already-detected faces (tier escalation)."""
+        return self._pose_facts(img, faces)
+
+    def _pose_facts(self, img, faces):
+
+        source = getattr(self.pose_checker, "SOURCE", "FAN")
+
+        empty = {
+            "source": source,
+            "faces": [],
+            "pose_ok_ratio": 0.0,
+            "worst_yaw": None,
+            "worst_pitch": None,
+            "worst_roll": None,
+            "status": False
+        }
+
+        # No RetinaFace box → nothing for FAN to refine (no fallback SFD pass)
+        if not faces:
+            return empty
+
+        self.log.info(f"[FACE QC] Running {source} pose analysis on {len(faces)} shared box(es)")
+
+        import torch
+
+        # Free temporary detector memory before heavy FAN inference
+        torch.cuda.empty_cache()
+
+        # Unpadded boxes → FAN crop scale matches its SFD-box calibration
+        boxes = [np.array(f.get("raw_bbox") or f["bbox"], dtype=np.float32) for f in faces]
+
+        try:
+            with GPU_LOCK:
+                fan_poses = self.pose_checker.analyze_faces(
+                    img, boxes, landmarks=[f.get("landmarks") for f in faces]
+                )
+
+            self.log.info(f"[FACE QC] {source} analysis completed")
+
+        except Exception as e:
+            self.log.info(f"[FACE QC] {source} crashed: {e}")
+            return empty
+
+        pose_faces = []
+
+        for face_id, (face, fan_pose) in enumerate(zip(faces, fan_poses)):
+
+            if not fan_pose:
+                pose_faces.append({
+                    "face_id": face_id, "status": False,
+                    "yaw": None, "pitch": None, "roll": None
+                })
+                continue
+
+            # FAN 68-pt derived landmarks are finer than RetinaFace's 5-pt
+            if fan_pose.get("landmarks"):
+                face["landmarks"] = fan_pose["landmarks"]
+                face["landmarks_source"] = "fan"
+
+            pose_faces.append({
+                "face_id": face_id,
+                "status": True,
+                "yaw": fan_pose.get("yaw"),
+                "pitch": fan_pose.get("pitch"),
+                "roll": fan_pose.get("roll")
+            })
+
+        ok = [f for f in pose_faces if f["status"]]
+        if not ok:
+            return empty
+
+        def worst(axis):
+            vals = [abs(f[axis]) for f in ok if f[axis] is not None]
+            return max(vals) if vals else None
+
+        return {
+            "source": source,
+            "faces": pose_faces,
+            "pose_ok_ratio": round(len(ok) / len(pose_faces), 4),
+            "worst_yaw": worst("yaw"),
+            "worst_pitch": worst("pitch"),
+            "worst_roll": worst("roll"),
+            "status": True
+        }
+
+    # =========================================================
+    # 5-PT ROLL (CHEAP TIER)
+    # =========================================================
+    def _landmark_pose_facts(self, faces):
+
+        pose_faces = []
+
+        for face_id, face in enumerate(faces):
+
+            lm = face.get("landmarks") or {}
+            left_eye, right_eye = lm.get("left_eye"), lm.get("right_eye")
+
+            if left_eye is None or right_eye is None:
+                pose_faces.append({
+                    "face_id": face_id, "status": False,
+                    "yaw": None, "pitch": None, "roll": None
+                })
+                continue
+
+            (lx, ly), (rx, ry) = left_eye[:2], right_eye[:2]
+
+            # Eye line only → roll is measured, yaw / pitch are not
+            pose_faces.append({
+                "face_id": face_id,
+                "status": True,
+                "yaw": None,
+                "pitch": None,
+                "roll": round(float(np.degrees(np.arctan2(ry - ly, rx - lx))), 2)
+            })
+
+        ok = [f for f in pose_faces if f["status"]]
+        if not ok:
+            return {
+                "source": "landmarks5",
+                "faces": [],
+                "pose_ok_ratio": 0.0,
+                "worst_yaw": None,
+                "worst_pitch": None,
+                "worst_roll": None,
+                "status": False
+            }
+
+        return {
+            "source": "landmarks5",
+            "faces": pose_faces,
+            "pose_ok_ratio": round(len(ok) / len(pose_faces), 4),
+            "worst_yaw": None,
+            "worst_pitch": None,
+            "worst_roll": max(abs(f["roll"]) for f in ok),
+            "status": True
+        }
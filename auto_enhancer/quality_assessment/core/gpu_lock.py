@@ -1,3 +1,2 @@
-from threading import Lock
-
-GPU_LOCK = Lock()
+# One process-wide lock: QA model stages and the engine share the GPU
+from core.gpu_lock import GPU_LOCK  # noqa: F401
@@ -0,0 +1,128 @@
+# auto_enhancer/quality_assessment/core/qa_cache.py
+
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.logger import get_logger
+from utils.temp_manager import get_temp_subpath
+
+
+# Entries kept in RAM (reports are small dicts; disk keeps the rest)
+MEMORY_ENTRIES = 64
+
+
+def content_key(img: np.ndarray, config_version: str) -> str:
+    """Hash of decoded pixels + shape + QA config → same pixels, same facts."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(config_version.encode())
+    h.update(f"{img.shape}:{img.dtype}".encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def _json_default(o):
+    # numpy scalars / arrays (landmarks, boxes) → plain JSON
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    raise TypeError(f"Not JSON serializable: {type(o).__name__}")
+
+
+class QAResultCache:
+    """
+    Content-addressed QA report cache (memory + per-session disk)
+
+    ✔ Keyed by pixel hash + QA config version (not by path)
+      → re-assessing an unchanged image costs only the hash
+    ✔ Entries stored as JSON-safe dicts; every hit returns a fresh copy
+    ✔ Disk tier lives in the session temp folder (dropped with the session)
+    ❌ Never caches failures
+    """
+
+    def __init__(self, max_entries: int = MEMORY_ENTRIES, use_disk: bool = True):
+        self.max_entries = max_entries
+        self.log = get_logger()
+
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._dir = None
+        if use_disk:
+            try:
+                self._dir = get_temp_subpath("qa_cache")
+            except RuntimeError:
+                # No active session (scripts / tuning) → memory only
+                self._dir = None
+
+    # ------------------------------------------------
+    # Public API
+    # ------------------------------------------------
+
+    def get(self, key: str):
+        """Cached report dict for key, or None."""
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                return copy.deepcopy(data)
+
+        data = self._read_disk(key)
+        if data is not None:
+            self._remember(key, data)
+            return copy.deepcopy(data)
+
+        return None
+
+    def put(self, key: str, report_dict: dict):
+        # Round-trip through JSON once → memory and disk hold identical data
+        data = json.loads(json.dumps(report_dict, default=_json_default))
+        self._remember(key, data)
+        self._write_disk(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+
+    # ------------------------------------------------
+    # Tiers
+    # ------------------------------------------------
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._mem[key] = data
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def _read_disk(self, key):
+        if self._dir is None:
+            return None
+
+        path = self._dir / f"{key}.json"
+        if not path.exists():
+            return None
+
+        try:
+            return json.loads(path.read_text())
+        except Exception as e:
+            self.log.info(f"[QA] Cache entry unreadable → {path.name} ({e})")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write_disk(self, key, data):
+        if self._dir is None:
+            return
+
+        path = self._dir / f"{key}.json"
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(data))
+            tmp.replace(path)
+        except Exception as e:
+            self.log.info(f"[QA] Cache write failed → {path.name} ({e})")
@@ -1,9 +1,12 @@
 import cv2
 import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 from utils.logger import get_logger
+from core.gpu_lock import GPU_LOCK
 from auto_enhancer.quality_assessment.core.qa_report import QAReport
+from auto_enhancer.quality_assessment.core.qa_cache import QAResultCache, content_key
 
 # -------- PRE-QC --------
 from auto_enhancer.quality_assessment.QualityChecker.pre_qc.blur_checker import BlurChecker
@@ -11,13 +14,29 @@ from auto_enhancer.quality_assessment.QualityChecker.pre_qc.brightness_checker i
 from auto_enhancer.quality_assessment.QualityChecker.pre_qc.contrast_checker import ContrastChecker
 from auto_enhancer.quality_assessment.QualityChecker.pre_qc.noise_checker import NoiseChecker
 from auto_enhancer.quality_assessment.QualityChecker.pre_qc.resolution_checker import ResolutionChecker
-# -------- POST-QC --------
-from auto_enhancer.quality_assessment.QualityChecker.post_qc.pose_checker import FANPoseChecker
+from auto_enhancer.quality_assessment.QualityChecker.pre_qc.feature_context import ImageFeatureContext
+# -------- FACE ANALYSIS --------
+from auto_enhancer.quality_assessment.core.face_analysis import FaceAnalysisStage
 
 
 # -------- AI ENGINE --------
 from core.ai_engine import get_ai_engine
 
+# pre-QC (CPU) | face QC (detector, mask, FAN) | CLIP-IQA
+QA_WORKERS = 3
+
+# Bump whenever a checker, model or fact layout changes
+# → invalidates every cached QA report
+QA_CONFIG_VERSION = "qa-6"
+
+# CLIP-IQA: "global" → whole scene only | "faces" → scene + every face crop
+CLIP_MODES = ("global", "faces")
+FACE_CROP_MARGIN = 0.15      # context around the detector box
+MIN_CLIP_FACE = 24           # px; smaller crops carry no perceptual signal
+
+# Pose: "fan" → batched FAN 68-pt | "landmarks" → 5-pt PnP (no network)
+POSE_BACKENDS = ("fan", "landmarks")
+
 
 class QualityAssessmentEngine:
     """
@@ -30,21 +49,42 @@ class QualityAssessmentEngine:
 
     Produces ONLY facts.
     No decisions. No thresholds. No enhancement logic.
+
+    tiered=True → cheap tier first (pre-QC, MobileNet RetinaFace, 5-pt
+    roll); FAN / CLIP only inside the policy's uncertainty bands.
+    The bands belong to ForensicPolicyEngine, not to QA.
     """
 
-    def __init__(self, device="cuda", verbose=False):
+    def __init__(self, device="cuda", verbose=False, parallel=True, use_cache=True,
+                 clip_mode="global", tiered=False, pose_backend="fan"):
 
         self.device = device
         self.verbose = verbose
         self.log = get_logger()
 
+        # Independent fact stages run concurrently; model calls still
+        # serialize on GPU_LOCK, OpenCV pre-QC releases the GIL
+        self.parallel = parallel
+
+        if clip_mode not in CLIP_MODES:
+            raise ValueError(f"[QA] Unknown clip_mode: {clip_mode}")
+        self.clip_mode = clip_mode
+        self.tiered = tiered
+
+        if pose_backend not in POSE_BACKENDS:
+            raise ValueError(f"[QA] Unknown pose_backend: {pose_backend}")
+        self.pose_backend = pose_backend
+        self._pool = ThreadPoolExecutor(max_workers=QA_WORKERS, thread_name_prefix="qa") if parallel else None
+
+        # Identical pixels → identical facts (keyed by content, not path)
+        self.cache = QAResultCache() if use_cache else None
+
         # -------- Checkers (FACT EXTRACTORS) --------
         self.blur_checker = BlurChecker(verbose=verbose)
         self.brightness_checker = BrightnessChecker(verbose=verbose)
         self.contrast_checker = ContrastChecker(verbose=verbose)
         self.noise_checker = NoiseChecker(verbose=verbose)
         self.resolution_checker = ResolutionChecker(verbose=verbose)
-        self.fan_pose_checker = FANPoseChecker(verbose=verbose)
 
 
         # -------- AI Engine --------
@@ -53,38 +93,219 @@ class QualityAssessmentEngine:
         self.mask_classifier = self.ai.classify_mask
         self.clip_iqa = self.ai.clip_iqa
 
+        # Detect once; the pose backend (shared engine instance) reuses those boxes
+        pose_checker = self.ai.pose_checker if pose_backend == "fan" else self.ai.landmark_pose_checker
+        self.face_stage = FaceAnalysisStage(
+            self.detector, self.mask_classifier, pose_checker
+        )
+
+        if tiered:
+            from auto_enhancer.intelligence.core.score_builder import ScoreBuilder
+            from auto_enhancer.intelligence.profiles.forensic_policy import ForensicPolicyEngine
+
+            self.fast_face_stage = FaceAnalysisStage(
+                self.ai.detect_fast, self.mask_classifier, self.ai.pose_checker
+            )
+            self.score_builder = ScoreBuilder()
+            self.policy = ForensicPolicyEngine()
+
         self.log.info("[QA] Quality Assessment Engine initialized")
 
     # =========================================================
     # MAIN ENTRY
     # =========================================================
     def assess(self, image_path: str) -> QAReport:
-
-        start_total = time.time()
-        self.log.info("[QA] Assessment started")
+        """Path wrapper: decode once, then assess_array()."""
 
         img = cv2.imread(image_path)
         if img is None:
             raise ValueError(f"[QA] Cannot read image: {image_path}")
 
-        self.log.info("[QA] Step A: image loading")
+        self.log.info("[QA] Step A: image loaded from disk")
+        return self.assess_array(img, {"image_path": image_path})
+
+    def assess_array(self, img: np.ndarray, meta: dict = None) -> QAReport:
+        """
+        QA on decoded pixels (BGR uint8) — no disk round-trip.
+
+        Args:
+            img: image exactly as the pipeline holds it
+            meta: {"image_path": ...} recorded on the report
+        """
+
+        start_total = time.time()
+        self.log.info("[QA] Assessment started")
+
+        if not isinstance(img, np.ndarray) or img.size == 0:
+            raise ValueError("[QA] assess_array needs a non-empty numpy image")
+
+        image_path = (meta or {}).get("image_path")
+
+        key = None
+        if self.cache is not None:
+            tier = "tiered" if self.tiered else "full"
+            key = content_key(
+                img, f"{QA_CONFIG_VERSION}:{self.device}:{self.clip_mode}:{tier}:{self.pose_backend}"
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.log.info(f"[QA] Cache hit → {key[:12]} ({round(time.time() - start_total, 3)}s)")
+                return QAReport.from_dict(cached, image_path)
 
         report = QAReport(image_path)
 
-        self.log.info("[QA] Step B: running preqc")
-        preqc = self._run_preqc(img)
-        report.set_objective(preqc)
+        stages = {"preqc": (self._run_preqc, img)}
+        if self.tiered:
+            stages["face"] = (self._run_cheap_face_qc, img)
+        elif self.clip_mode == "faces":
+            # CLIP needs the boxes → chained after detection, still beside pre-QC
+            stages["face+clip"] = (self._run_face_and_clip, img)
+        else:
+            stages["face"] = (self._run_face_qc, img)
+            stages["clip"] = (self._run_clip, img)
+        timings = {}
+
+        def run(name):
+            fn, arg = stages[name]
+            t0 = time.time()
+            out = fn(arg)
+            timings[name] = round(time.time() - t0, 2)
+            return out
+
+        if self._pool:
+            self.log.info(f"[QA] Step B-D: {' | '.join(stages)} (concurrent)")
+            futures = {name: self._pool.submit(run, name) for name in stages}
+            results = {name: f.result() for name, f in futures.items()}
+        else:
+            results = {}
+            for step, name in zip("BCD", stages):
+                self.log.info(f"[QA] Step {step}: {name}")
+                results[name] = run(name)
+
+        if "face+clip" in results:
+            results["face"], results["clip"] = results.pop("face+clip")
 
-        self.log.info("[QA] Step C: running face qc")
-        faceqc = self._run_face_qc(img)
-        report.set_faces(faceqc)
+        report.set_objective(results["preqc"])
+        report.set_faces(results["face"])
+
+        if self.tiered:
+            t0 = time.time()
+            self._escalate(img, report)
+            timings["escalation"] = round(time.time() - t0, 2)
+        else:
+            report.set_perceptual(results["clip"])
+            report.set_tiers({
+                "objective": "cheap",
+                "faces": "full",
+                "pose": "full",
+                "perceptual": "full"
+            })
 
-        self.log.info("[QA] Step D: clip IQA")
-        report.set_perceptual(self.clip_iqa.assess(image_path))
+        if key is not None:
+            self.cache.put(key, report.to_dict())
 
-        self.log.info(f"[QA] Assessment finished ({round(time.time() - start_total, 2)}s)")
+        self.log.info(
+            f"[QA] Assessment finished ({round(time.time() - start_total, 2)}s) | "
+            + " ".join(f"{k}={v}s" for k, v in timings.items())
+        )
         return report
 
+    # =========================================================
+    # TIERED QA
+    # =========================================================
+
+    def _run_cheap_face_qc(self, img):
+        return self.fast_face_stage.run(img, fine_pose=False)
+
+    def _escalate(self, img, report):
+        """
+        Re-measure only the cheap facts the policy cannot decide on.
+        Records the producing tier per fact block on the report.
+        """
+        faces = report.faces
+        face_present = bool(faces.get("detected"))
+
+        tiers = {
+            "objective": "cheap",
+            "faces": "cheap",
+            "pose": "cheap" if face_present else "skipped",
+            "perceptual": "skipped"
+        }
+
+        worst_roll = faces.get("pose", {}).get("worst_roll")
+        if self.policy.needs_fine_pose(worst_roll, face_present):
+            self.log.info(f"[QA] Tier escalation → FAN (5-pt roll={worst_roll})")
+            faces["pose"] = self.fast_face_stage.refine_pose(img, faces.get("faces", []))
+            tiers["pose"] = "escalated"
+
+        scores = self.score_builder.build(report)
+        if self.clip_iqa is not None and self.policy.needs_perceptual(scores):
+            self.log.info(
+                f"[QA] Tier escalation → CLIP-IQA "
+                f"(overall={scores.overall_quality:.3f}, sharpness={scores.sharpness_score:.3f})"
+            )
+            if self.clip_mode == "faces":
+                report.set_perceptual(self._run_face_clip(img, faces.get("faces", [])))
+            else:
+                report.set_perceptual(self._run_clip(img))
+            tiers["perceptual"] = "escalated"
+
+        report.set_tiers(tiers)
+        self.log.info("[QA] Tiers → " + " ".join(f"{k}={v}" for k, v in tiers.items()))
+
+    # =========================================================
+    # PERCEPTUAL (CLIP-IQA)
+    # =========================================================
+
+    def _run_clip(self, img):
+        if self.clip_iqa is None:
+            return {}
+        with GPU_LOCK:
+            return self.clip_iqa.assess_array(img)
+
+    def _run_face_and_clip(self, img):
+        faceqc = self._run_face_qc(img)
+        return faceqc, self._run_face_clip(img, faceqc.get("faces", []))
+
+    def _run_face_clip(self, img, faces):
+        """
+        Scene + every face crop in ONE batched CLIP pass.
+        Per-face score lands on the face dict ("clip_iqa_score");
+        the scene score stays in the perceptual block.
+        """
+        if self.clip_iqa is None:
+            return {}
+
+        crops, owners = [], []
+        for face in faces:
+            face["clip_iqa_score"] = None
+            crop = self._face_crop(img, face["bbox"])
+            if crop is not None:
+                crops.append(crop)
+                owners.append(face)
+
+        with GPU_LOCK:
+            scores = self.clip_iqa.assess_batch([img] + crops)
+
+        for face, score in zip(owners, scores[1:]):
+            face["clip_iqa_score"] = score["clip_iqa_score"]
+
+        self.log.info(f"[QA] CLIP-IQA scored scene + {len(crops)} face crop(s)")
+        return scores[0]
+
+    def _face_crop(self, img, bbox):
+        h, w = img.shape[:2]
+        x1, y1, x2, y2 = bbox
+
+        mx = int((x2 - x1) * FACE_CROP_MARGIN)
+        my = int((y2 - y1) * FACE_CROP_MARGIN)
+        x1, y1 = max(0, x1 - mx), max(0, y1 - my)
+        x2, y2 = min(w, x2 + mx), min(h, y2 + my)
+
+        if min(x2 - x1, y2 - y1) < MIN_CLIP_FACE:
+            return None
+        return img[y1:y2, x1:x2]
+
 
     # =========================================================
     # PRE-QC (PURE IMAGE FACTS)
@@ -100,9 +321,12 @@ class QualityAssessmentEngine:
             "resolution": self.resolution_checker
         }
 
+        # One lazy feature cache → gray / Laplacian / Canny computed once
+        ctx = ImageFeatureContext(img)
+
         results = {}
         for name, checker in checks.items():
-            status, details = checker.check(img)
+            status, details = checker.check(img, ctx=ctx)
             results[name] = {"status": status, "details": details}
 
         # ------------------------------------------------
@@ -153,134 +377,7 @@ class QualityAssessmentEngine:
             }
         }
     # =========================================================
-        # FACE FACTS (NO POSE LOGIC HERE)
-            # =========================================================
+    # FACE FACTS (single shared detection → FaceAnalysisStage)
+    # =========================================================
     def _run_face_qc(self, img):
-
-        import torch
-
-        self.log.info("[FACE QC] Step 1: detector start")
-        self.log.info(f"[GPU] Allocated: {torch.cuda.memory_allocated()/1e9:.2f} GB")
-
-        detections = self.detector(img)
-
-        self.log.info(f"[FACE QC] Step 2: detector finished | faces={len(detections)}")
-
-        h, w = img.shape[:2]
-        img_area = h * w
-
-        faces = []
-
-        # ---------- PROCESS ALL FACES ----------
-        for idx, det in enumerate(detections):
-
-            x1, y1, x2, y2 = det["box"]
-
-            x1 = max(0, int(x1))
-            y1 = max(0, int(y1))
-            x2 = min(w, int(x2))
-            y2 = min(h, int(y2))
-
-            if x2 <= x1 or y2 <= y1:
-                continue
-
-            face = img[y1:y2, x1:x2]
-            if face.size == 0:
-                continue
-
-            fh, fw = face.shape[:2]
-            if fh < 10 or fw < 10:
-                continue
-
-            gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
-
-            blur = cv2.Laplacian(gray, cv2.CV_64F).var()
-            brightness = gray.mean()
-
-            label, conf = self.mask_classifier(face)
-
-            faces.append({
-                "bbox": [x1, y1, x2, y2],
-                "width": fw,
-                "height": fh,
-                "area_ratio": round((fw * fh) / img_area, 4),
-                "blur_variance": round(float(blur), 2),
-                "brightness": round(float(brightness), 2),
-                "masked": label == "Mask",
-                "mask_conf": float(conf),
-                "landmarks": det.get("landmarks"),
-                "area": fw * fh
-            })
-
-        # ---------- RUN FAN ONCE ----------
-        self.log.info("[FACE QC] Running FAN pose analysis")
-
-        import torch
-        from core.gpu_lock import GPU_LOCK
-
-        # Free temporary detector memory before heavy FAN inference
-        torch.cuda.empty_cache()
-        torch.cuda.ipc_collect()
-
-        # ---- Image diagnostics ----
-        if img is None:
-            self.log.info("[FACE QC] ERROR: image is None before FAN")
-        else:
-            self.log.info(f"[FACE QC] Image shape before FAN: {img.shape}")
-            self.log.info(f"[FACE QC] Image dtype: {img.dtype}")
-            self.log.info(f"[FACE QC] Image min/max: {img.min()} / {img.max()}")
-
-        try:
-            with GPU_LOCK:
-                fan_pose = self.fan_pose_checker.analyze(img)
-
-            self.log.info("[FACE QC] FAN analysis completed")
-
-        except Exception as e:
-            self.log.info(f"[FACE QC] FAN crashed: {e}")
-            fan_pose = None
-
-
-        if fan_pose:
-            yaw = fan_pose.get("yaw")
-            pitch = fan_pose.get("pitch")
-            roll = fan_pose.get("roll")
-
-            pose_facts = {
-                "source": "FAN",
-                "faces": [{
-                    "face_id": 0,
-                    "status": True,
-                    "yaw": yaw,
-                    "pitch": pitch,
-                    "roll": roll
-                }],
-                "pose_ok_ratio": 1.0,
-                "worst_yaw": abs(yaw) if yaw is not None else None,
-                "worst_pitch": abs(pitch) if pitch is not None else None,
-                "worst_roll": abs(roll) if roll is not None else None
-            }
-
-            if faces:
-                faces[0]["landmarks"] = fan_pose.get("landmarks")
-
-        else:
-            pose_facts = {
-                "source": "FAN",
-                "faces": [],
-                "pose_ok_ratio": 0.0,
-                "worst_yaw": None,
-                "worst_pitch": None,
-                "worst_roll": None,
-                "status": False
-            }
-
-        self.log.info(f"[FACE QC] Faces retained: {len(faces)}")
-
-        return {
-            "detected": len(faces) > 0,
-            "count": len(faces),
-            "faces": faces,
-            "largest_face": max(faces, key=lambda f: f["area_ratio"]) if faces else None,
-            "pose": pose_facts
-        }
+        return self.face_stage.run(img)
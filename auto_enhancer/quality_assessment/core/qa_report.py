@@ -15,10 +15,16 @@ class QAReport:
         self.image_path = image_path
         self.timestamp = datetime.now().isoformat()
 
+        # Timestamp of the original assessment when facts come from the QA cache
+        self.cached_from = None
+
         self.objective = {}
         self.faces = {}
         self.perceptual = {}
 
+        # Which QA tier produced each fact block (tiered mode)
+        self.tiers = {}
+
     # ----------------------------
     # Data setters
     # ----------------------------
@@ -32,21 +38,57 @@ class QAReport:
     def set_perceptual(self, data: dict):
         self.perceptual = data or {}
 
+    def set_tiers(self, data: dict):
+        self.tiers = data or {}
+
+    # ----------------------------
+    # Cached face geometry
+    # ----------------------------
+
+    def face_list(self) -> list:
+        """
+        Per-face facts incl. landmarks from the shared face-analysis stage.
+        Valid for this exact image → PoseCorrector / GFPGAN reuse them
+        instead of running their own detectors.
+        """
+        return (self.faces or {}).get("faces", [])
+
     # ----------------------------
     # Serialization
     # ----------------------------
 
     def to_dict(self):
+        meta = {
+            "image_path": self.image_path,
+            "timestamp": self.timestamp
+        }
+        if self.cached_from:
+            meta["cached_from"] = self.cached_from
+
         return {
-            "meta": {
-                "image_path": self.image_path,
-                "timestamp": self.timestamp
-            },
+            "meta": meta,
             "objective": self.objective,
             "faces": self.faces,
-            "perceptual": self.perceptual
+            "perceptual": self.perceptual,
+            "tiers": self.tiers
         }
 
+    @classmethod
+    def from_dict(cls, data: dict, image_path: str = None):
+        """
+        Rebuild a report from to_dict() output (QA cache hits).
+        Keeps its own (fresh) timestamp; the original one is recorded as cached_from.
+        """
+        meta = data.get("meta", {})
+
+        report = cls(image_path or meta.get("image_path"))
+        report.cached_from = meta.get("cached_from") or meta.get("timestamp")
+        report.set_objective(data.get("objective"))
+        report.set_faces(data.get("faces"))
+        report.set_perceptual(data.get("perceptual"))
+        report.set_tiers(data.get("tiers"))
+        return report
+
     # =========================================================
     # PROFESSIONAL FORENSIC CONSOLE REPORT
     # =========================================================
@@ -91,6 +133,8 @@ class QAReport:
             lines.append(f"     • Face blur var     : {largest.get('blur_variance', 0)}")
             lines.append(f"     • Face brightness   : {largest.get('brightness', 0)}")
             lines.append(f"     • Masked            : {largest.get('masked', False)}")
+            if largest.get("clip_iqa_score") is not None:
+                lines.append(f"     • Face CLIP-IQA     : {largest.get('clip_iqa_score')}")
         # ================= POSE =================
         pose = face.get("pose", {})
         if pose:
@@ -121,6 +165,12 @@ class QAReport:
             except:
                 lines.append(f"     • {k:<18}: {v}")
 
+        if self.tiers:
+            lines.append("")
+            lines.append("[QA TIERS]")
+            for k, v in self.tiers.items():
+                lines.append(f"     • {k:<18}: {v}")
+
         lines.append("======================================================================")
 
         return "\n".join(lines)
@@ -1,26 +1,54 @@
 # auto_enhancer/quality_assessment/models/clip_iqa.py
 
+import threading
+from collections import OrderedDict
+
 import torch
+import torch.nn.functional as F
 import clip
 import cv2
 import numpy as np
-from PIL import Image
 from utils.logger import get_logger
+from core.inference_utils import resolve_precision, autocast_context
+from auto_enhancer.quality_assessment.core.qa_cache import content_key
 LOG = get_logger()
 
+# CLIP ViT normalization (same constants as clip's PIL preprocess)
+_CLIP_MEAN = (0.48145466, 0.4578275, 0.40821073)
+_CLIP_STD = (0.26862954, 0.26130258, 0.27577711)
+
+# Images per encode_image call / image features kept in RAM
+MAX_BATCH = 32
+FEATURE_CACHE_ENTRIES = 256
+
 
 class CLIPIQA:
     """
     Deep perceptual image quality model using CLIP.
     Outputs a human-aligned quality score between 0 and 1.
+
+    ✔ Text features computed once
+    ✔ assess_batch → tensor-native preprocess, one encode_image per batch
+    ✔ Image features cached by pixel hash (before/after, re-runs)
+    ✔ Optional fp16 / bf16 autocast (default fp32)
+    ❌ Tensor resize ≈ PIL bicubic, not bit-exact
+      (tuning/check_clip_preprocess.py → score drift vs clip's preprocess)
     """
 
-    def __init__(self, device="cuda"):
+    def __init__(self, device="cuda", precision="fp32"):
         self.device = device if torch.cuda.is_available() else "cpu"
+        self.precision = resolve_precision(self.device, precision)
 
         LOG.info("[CLIP-IQA] Loading CLIP model...")
         self.model, self.preprocess = clip.load("ViT-B/32", device=self.device)
         self.model.eval()
+        self.input_size = self.model.visual.input_resolution
+
+        self._mean = torch.tensor(_CLIP_MEAN, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(_CLIP_STD, device=self.device).view(1, 3, 1, 1)
+
+        self._features = OrderedDict()
+        self._lock = threading.Lock()
 
         # Fixed quality prompts (used in many CLIP-IQA works)
         self.prompts = [
@@ -37,50 +65,130 @@ class CLIPIQA:
             self.text_features = self.model.encode_text(text_tokens)
             self.text_features = self.text_features / self.text_features.norm(dim=-1, keepdim=True)
 
-        LOG.info("[CLIP-IQA] Model ready on", self.device)
+        # Scoring happens on CPU float32 features (cached image features live there)
+        self._text_cpu = self.text_features.float().cpu()
+
+        LOG.info(f"[CLIP-IQA] Model ready on {self.device} | precision={self.precision}")
 
     # --------------------------------------------------
 
     def assess(self, image_path: str):
+        """Path wrapper around assess_array()."""
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Could not read image: {image_path}")
+
+        return self.assess_array(img)
+
+    def assess_array(self, img: np.ndarray):
+        """Single-image wrapper around assess_batch()."""
+        return self.assess_batch([img])[0]
+
+    def assess_batch(self, arrays):
         """
+        Args:
+            arrays: decoded BGR uint8 images (any sizes)
+
         Returns:
+            list of
             {
                 "clip_iqa_score": float (0–1),
                 "raw_similarities": dict
             }
         """
+        keys = [content_key(img, f"clip-vitb32-{self.precision}") for img in arrays]
 
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Could not read image: {image_path}")
+        with self._lock:
+            feats = [self._features.get(k) for k in keys]
+            for k, f in zip(keys, feats):
+                if f is not None:
+                    self._features.move_to_end(k)
 
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(img)
-        image_input = self.preprocess(pil_img).unsqueeze(0).to(self.device)
+        missing = [i for i, f in enumerate(feats) if f is None]
 
-        with torch.no_grad():
-            image_features = self.model.encode_image(image_input)
-            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+        for start in range(0, len(missing), MAX_BATCH):
+            idx = missing[start:start + MAX_BATCH]
+            encoded = self._encode([arrays[i] for i in idx])
+
+            with self._lock:
+                for i, f in zip(idx, encoded):
+                    feats[i] = f
+                    self._features[keys[i]] = f
+                while len(self._features) > FEATURE_CACHE_ENTRIES:
+                    self._features.popitem(last=False)
+
+        if not feats:
+            return []
+
+        return self._score(torch.stack(feats))
+
+    # --------------------------------------------------
+
+    def _preprocess(self, img: np.ndarray) -> torch.Tensor:
+        """
+        Tensor-native version of clip's PIL preprocess:
+        bicubic resize (short side) → uint8 → center crop → normalize.
+        Size / crop math follows torchvision Resize + CenterCrop.
+        """
+        size = self.input_size
+
+        x = torch.from_numpy(np.ascontiguousarray(img[:, :, ::-1])).to(self.device)
+        x = x.permute(2, 0, 1).unsqueeze(0).float()
+
+        # torchvision: short side → size, long side truncated
+        h, w = x.shape[-2:]
+        if w <= h:
+            nh, nw = int(size * h / w), size
+        else:
+            nh, nw = size, int(size * w / h)
+        x = F.interpolate(x, size=(nh, nw), mode="bicubic", align_corners=False, antialias=True)
+
+        # PIL resizes in uint8 → same quantization before ToTensor
+        x = x.round_().clamp_(0.0, 255.0).div_(255.0)
+
+        top, left = int(round((nh - size) / 2.0)), int(round((nw - size) / 2.0))
+        x = x[:, :, top:top + size, left:left + size]
+
+        return ((x - self._mean) / self._std)[0]
+
+    def _preprocess_reference(self, img: np.ndarray) -> torch.Tensor:
+        """clip's own PIL preprocess (parity checks only)."""
+        from PIL import Image
+
+        return self.preprocess(Image.fromarray(np.ascontiguousarray(img[:, :, ::-1])))
+
+    def _encode(self, arrays):
+        """Normalized image features (float32, CPU), one forward pass."""
+        batch = torch.stack([self._preprocess(img) for img in arrays])
+
+        with torch.inference_mode(), autocast_context(self.device, self.precision):
+            features = self.model.encode_image(batch).float()
+
+        features = features / features.norm(dim=-1, keepdim=True)
+        return list(features.cpu())
 
-            similarity = (image_features @ self.text_features.T).softmax(dim=-1)[0]
+    def _score(self, image_features: torch.Tensor):
+        sims = (image_features @ self._text_cpu.T).softmax(dim=-1).numpy()
 
-        sims = similarity.detach().cpu().numpy()
+        results = []
+        for row in sims:
+            result = dict(zip(self.prompts, row.tolist()))
 
-        result = dict(zip(self.prompts, sims.tolist()))
+            # Positive vs negative quality separation
+            positive = np.mean([result[self.prompts[0]],
+                                 result[self.prompts[1]],
+                                 result[self.prompts[2]]])
 
-        # Positive vs negative quality separation
-        positive = np.mean([result[self.prompts[0]],
-                             result[self.prompts[1]],
-                             result[self.prompts[2]]])
+            negative = np.mean([result[self.prompts[3]],
+                                 result[self.prompts[4]],
+                                 result[self.prompts[5]]])
 
-        negative = np.mean([result[self.prompts[3]],
-                             result[self.prompts[4]],
-                             result[self.prompts[5]]])
+            # Normalize into 0–1 forensic quality score
+            quality_score = float(positive / (positive + negative + 1e-8))
 
-        # Normalize into 0–1 forensic quality score
-        quality_score = float(positive / (positive + negative + 1e-8))
+            results.append({
+                "clip_iqa_score": round(quality_score, 4),
+                "raw_similarities": result
+            })
 
-        return {
-            "clip_iqa_score": round(quality_score, 4),
-            "raw_similarities": result
-        }
+        return results
@@ -4,11 +4,10 @@
 
 import torch
 import time
-import tempfile
-import os
 import numpy as np
 import cv2
 import io
+import warnings
 from contextlib import redirect_stdout, redirect_stderr
 
 from utils.logger import get_logger
@@ -80,6 +79,15 @@ class AIEngine:
             self.forensic_detector = FaceDetector(network="resnet50")
         self.LOGGER.info("[ENGINE] RetinaFace loaded")
 
+        # ---------- RetinaFace (MobileNet, tiered QA cheap tier) ----------
+        try:
+            with redirect_stdout(NULL), redirect_stderr(NULL):
+                self.fast_detector = FaceDetector(network="mobilenet0.25")
+            self.LOGGER.info("[ENGINE] RetinaFace-MobileNet loaded")
+        except Exception as e:
+            self.fast_detector = None
+            self.LOGGER.warning(f"[ENGINE] RetinaFace-MobileNet unavailable → {e}")
+
         # ---------- Mask classifier ----------
         with redirect_stdout(NULL), redirect_stderr(NULL):
             from face_recognition.detection.retinaface_wrapper import MaskClassifier
@@ -104,12 +112,16 @@ class AIEngine:
             self.pose_checker = FANPoseChecker(device=self.device)
         self.LOGGER.info("[ENGINE] FAN pose checker loaded")
 
+        # ---------- 5-pt PnP Pose (QA, no weights) ----------
+        from auto_enhancer.quality_assessment.QualityChecker.post_qc.landmark_pose_checker import LandmarkPoseChecker
+        self.landmark_pose_checker = LandmarkPoseChecker()
+
 
         # ---------- HI-DIFF ----------
         try:
             with redirect_stdout(NULL), redirect_stderr(NULL):
                 from auto_enhancer.enhancement.deblurring.HI_Diff.hidiff_wrapper import HiDiffWrapper
-                self.hidiff = HiDiffWrapper()
+                self.hidiff = HiDiffWrapper(device=self.device)
             self.LOGGER.info("[ENGINE] HI-DIFF loaded")
         except Exception as e:
             self.hidiff = None
@@ -143,30 +155,38 @@ class AIEngine:
 
         with torch.no_grad():
 
+            # ---------- Compiled graphs (cached by earlier sessions) ----------
+            # Loaded from disk here so the first real call doesn't re-trace
+            from core.model_compiler import get_model_compiler
+            if get_model_compiler().enabled:
+                for label, owner in (
+                    ("Graphs GFPGAN", self.face_restorer),
+                    ("Graphs FAN", self.pose_checker),
+                    ("Graphs HI-DIFF", self.hidiff),
+                ):
+                    if owner is None:
+                        continue
+                    try:
+                        timed(label, owner.preload_compiled)
+                    except Exception as e:
+                        self.LOGGER.warning(f"[ENGINE] {label} preload skipped → {e}")
+
             # ---------- Detection / Recognition ----------
             timed("SCRFD", lambda: self.live_detector.detect(dummy))
             timed("RetinaFace", lambda: self.forensic_detector.detect(dummy))
+            if self.fast_detector:
+                timed("RetinaFace-MN", lambda: self.fast_detector.detect(dummy))
             timed("Mask", lambda: self.mask_classifier.classify(face))
             timed("ArcFace", lambda: self.face_embedder.get_embedding(face, masked=False))
 
             # ---------- GFPGAN ----------
             try:
-                base = tempfile.gettempdir()
-                tmp = os.path.join(base, "gfpgan_warmup.jpg")
-                cv2.imwrite(tmp, dummy)
-
-                timed("GFPGAN", lambda: self.face_restorer.enhance_image(
-                    tmp,
-                    {
-                        "cropped_faces": base,
-                        "restored_faces": base,
-                        "cmp": base,
-                        "restored_imgs": base
-                    }
+                # Generator only: aligned input, no facexlib detector load
+                aligned = np.zeros((512, 512, 3), dtype=np.uint8)
+                timed("GFPGAN", lambda: self.face_restorer.restorer.enhance(
+                    aligned, has_aligned=True, paste_back=False
                 ))
 
-                os.remove(tmp)
-
             except Exception as e:
                 self.LOGGER.warning(f"[ENGINE] GFPGAN warmup skipped → {e}")
 
@@ -174,18 +194,9 @@ class AIEngine:
             # ---------- HI-DIFF ----------
             if self.hidiff:
                 try:
+                    # Builds the resident model + first CUDA kernels
                     small = np.zeros((64, 64, 3), dtype=np.uint8)
-                    tmp = os.path.join(tempfile.gettempdir(), "hidiff_warmup.png")
-                    cv2.imwrite(tmp, small)
-
-                    t0 = time.time()
-                    with redirect_stdout(NULL), redirect_stderr(NULL):
-                        self.hidiff.enhance(tmp, silent=True)
-
-                    ms = int((time.time() - t0) * 1000)
-                    self.LOGGER.info(f"[ENGINE] Warmup → {'HI-DIFF':<14} {ms:4d} ms")
-
-                    os.remove(tmp)
+                    timed("HI-DIFF", lambda: self.hidiff.deblur(small, "medium"))
 
                 except Exception as e:
                     self.LOGGER.warning(f"[ENGINE] HI-DIFF warmup skipped → {e}")
@@ -193,12 +204,7 @@ class AIEngine:
             # ---------- CLIP-IQA ----------
             if self.clip_iqa:
                 try:
-                    tmp = os.path.join(tempfile.gettempdir(), "clipiqa_warmup.jpg")
-                    cv2.imwrite(tmp, dummy)
-
-                    timed("CLIP-IQA", lambda: self.clip_iqa.assess(tmp))
-
-                    os.remove(tmp)
+                    timed("CLIP-IQA", lambda: self.clip_iqa.assess_array(dummy))
 
                 except Exception as e:
                     self.LOGGER.warning(f"[ENGINE] CLIP-IQA warmup skipped → {e}")
@@ -224,14 +230,26 @@ class AIEngine:
     def detect_forensic(self, image):
         return self.forensic_detector.detect(image)
 
+    def detect_fast(self, image):
+        """5-pt RetinaFace at MobileNet cost; ResNet50 if its weights are missing."""
+        detector = self.fast_detector or self.forensic_detector
+        return detector.detect(image)
+
     def classify_mask(self, face):
         return self.mask_classifier.classify(face)
 
     def get_embedding(self, face, masked=False):
         return self.face_embedder.get_embedding(face, masked)
 
-    def restore_face(self, img_path, output_dirs, suffix=None):
-        return self.face_restorer.enhance_image(img_path, output_dirs, suffix)
+    def restore_face(self, img_path, output_dirs, suffix=None, faces=None):
+        # suffix was never used by GFPGAN; kept so old callers don't break
+        if suffix is not None:
+            warnings.warn(
+                "restore_face(suffix=...) is deprecated and ignored",
+                DeprecationWarning,
+                stacklevel=2
+            )
+        return self.face_restorer.enhance_image(img_path, output_dirs, faces=faces)
 
     def correct_pose(self, input_path):
         return self.pose_corrector.correct_pose(input_path)
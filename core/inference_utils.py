@@ -0,0 +1,86 @@
+# =========================================================
+# Shared inference helpers (precision / memory layout)
+# =========================================================
+
+from contextlib import contextmanager
+
+import torch
+
+# fp32 until tuning/check_precision.py has passed on the forensic samples;
+# "bf16" / "auto" (bf16 where supported) stay opt-in per engine
+DEFAULT_PRECISION = "fp32"
+
+_DTYPES = {
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+}
+
+
+def bf16_supported(device) -> bool:
+    if str(device).startswith("cuda"):
+        return torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+
+    # CPU bf16 kernels need oneDNN + AVX512-BF16 / AMX
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def resolve_precision(device, precision: str = DEFAULT_PRECISION) -> str:
+    """
+    Map a requested precision to what the device can actually run.
+
+    ✔ "auto" → "bf16" if supported, else "fp32"
+    ✔ "bf16" on unsupported hardware → "fp32"
+    ✔ "fp16" is CUDA only
+    """
+    precision = (precision or "fp32").lower()
+    cuda = str(device).startswith("cuda")
+
+    if precision == "auto":
+        return "bf16" if bf16_supported(device) else "fp32"
+    if precision == "bf16":
+        return "bf16" if bf16_supported(device) else "fp32"
+    if precision == "fp16":
+        return "fp16" if cuda else "fp32"
+    return "fp32"
+
+
+def prepare_module(module: torch.nn.Module, channels_last: bool = True) -> torch.nn.Module:
+    """eval + frozen params, optionally NHWC weights for conv-heavy nets."""
+    module.eval()
+    for p in module.parameters():
+        p.requires_grad_(False)
+    if channels_last:
+        module.to(memory_format=torch.channels_last)
+    return module
+
+
+def to_layout(t: torch.Tensor, channels_last: bool = True) -> torch.Tensor:
+    if channels_last and t.dim() == 4:
+        return t.contiguous(memory_format=torch.channels_last)
+    return t
+
+
+@contextmanager
+def autocast_context(device, precision: str = "fp32"):
+    """Autocast at the resolved precision; no-op for fp32."""
+    dtype = _DTYPES.get(precision)
+    if dtype is None:
+        yield
+        return
+
+    device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+    with torch.autocast(device_type=device_type, dtype=dtype):
+        yield
+
+
+@contextmanager
+def inference_context(device, precision: str = "fp32"):
+    """
+    torch.inference_mode + autocast for the resolved precision.
+    Outputs may come back in bf16/fp16 — call .float() before numpy.
+    """
+    with torch.inference_mode(), autocast_context(device, precision):
+        yield
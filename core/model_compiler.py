@@ -0,0 +1,240 @@
+# =========================================================
+# Ahead-of-time compiled model graphs (on-disk cache)
+# =========================================================
+
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+import torch
+
+from utils.paths import WEIGHTS_DIR
+from utils.logger import log_event
+from core.inference_utils import autocast_context
+
+# off | trace | inductor  (env override: CRIMESCAN_COMPILE)
+COMPILE_BACKEND = os.environ.get("CRIMESCAN_COMPILE", "off").lower()
+
+# Survives sessions (the session folder is temporary)
+COMPILE_CACHE_DIR = WEIGHTS_DIR / "compiled"
+
+# Spatial inputs are padded up to a multiple of this, so a handful of
+# graphs cover every image size instead of one graph per resolution
+BUCKET_MULTIPLE = 64
+
+
+# ========================================================
+# Global singleton instance
+# ========================================================
+
+_COMPILER = None
+_COMPILER_LOCK = threading.Lock()
+
+
+def get_model_compiler():
+    global _COMPILER
+    with _COMPILER_LOCK:
+        if _COMPILER is None:
+            _COMPILER = ModelCompiler()
+    return _COMPILER
+
+
+def bucket_size(n: int, multiple: int = BUCKET_MULTIPLE) -> int:
+    return -(-int(n) // multiple) * multiple
+
+
+def weights_stamp(*paths) -> str:
+    """Short hash of weight files (path + size + mtime) → stale graphs are never loaded."""
+    h = hashlib.sha1()
+    for p in paths:
+        if p is None:
+            continue
+        p = Path(p)
+        h.update(str(p).encode())
+        if p.exists():
+            st = p.stat()
+            h.update(f"{st.st_size}:{int(st.st_mtime)}".encode())
+    return h.hexdigest()[:10]
+
+
+class _TracedGraph:
+    """
+    Loaded TorchScript graph. Autocast casts were recorded at trace
+    time, so runtime autocast is switched off around the call.
+    """
+
+    def __init__(self, graph, device):
+        self.graph = graph
+        self.device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+
+    def __call__(self, *args):
+        with torch.autocast(device_type=self.device_type, enabled=False):
+            return self.graph(*args)
+
+
+class CompiledModule:
+    """
+    Drop-in callable for a network: compiles (or loads) a graph for each
+    input bucket on first use, eager when disabled. The first input sets
+    the bucket; extra inputs (e.g. seeded noise) are traced alongside.
+    """
+
+    def __init__(self, name, module, device, precision="fp32", stamp="", compiler=None):
+        self.name = name
+        self.module = module
+        self.device = device
+        self.precision = precision
+        self.stamp = stamp
+        self.compiler = compiler or get_model_compiler()
+
+    def __call__(self, *inputs):
+        graph = self.compiler.get(self.name, self.module, inputs, self.device, self.precision, self.stamp)
+        return graph(*inputs)
+
+    def preload(self) -> int:
+        return self.compiler.preload(self.name, self.device, self.precision, self.stamp)
+
+
+class ModelCompiler:
+    """
+    Optional compile stage for the enhancement / QA networks.
+
+    ✔ trace    → torch.jit.trace (or freeze for scripted nets) + torch.jit.save
+    ✔ inductor → torch.compile with a persistent FX-graph cache dir
+    ✔ Artifacts keyed by name, input bucket, precision, device, torch, weights
+    ✔ preload() loads cached graphs at warmup — no re-tracing
+    ✔ Any compile error → eager module (never breaks inference)
+    """
+
+    def __init__(self, backend: str = COMPILE_BACKEND, cache_dir: Path = COMPILE_CACHE_DIR):
+        self.backend = backend if backend in ("trace", "inductor") else "off"
+        self.cache_dir = Path(cache_dir)
+
+        self._graphs = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+        if self.backend == "off":
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.backend == "inductor":
+            # Must be set before inductor is first imported
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(self.cache_dir / "inductor"))
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+        log_event("ENGINE", f"Model compiler → backend={self.backend} | cache={self.cache_dir}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "off"
+
+    # ------------------------------------------------
+    # Keys
+    # ------------------------------------------------
+
+    def _suffix(self, device, precision, stamp):
+        device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+        torch_ver = torch.__version__.split("+")[0]
+        return f"{precision}-{device_type}-torch{torch_ver}-{stamp}"
+
+    def _key(self, name, shape, device, precision, stamp):
+        bucket = "x".join(str(int(s)) for s in shape)
+        return f"{name}-{bucket}-{self._suffix(device, precision, stamp)}"
+
+    # ------------------------------------------------
+    # Public API
+    # ------------------------------------------------
+
+    def get(self, name, module, example, device, precision="fp32", stamp=""):
+        """
+        Compiled callable for module at example's shape (its bucket).
+
+        Args:
+            example: input tensor (or tuple of inputs, first one sets the
+                     bucket) already padded to the bucket shape
+        Returns:
+            compiled callable, or module itself when disabled / failed
+        """
+        if not self.enabled:
+            return module
+
+        inputs = example if isinstance(example, tuple) else (example,)
+
+        if self.backend == "inductor":
+            key = f"{name}-{self._suffix(device, precision, stamp)}"
+        else:
+            key = self._key(name, inputs[0].shape, device, precision, stamp)
+
+        with self._lock:
+            if key in self._failed:
+                return module
+            if key in self._graphs:
+                return self._graphs[key]
+
+            try:
+                if self.backend == "inductor":
+                    # Shape guards recompile per bucket; kernels hit the disk cache
+                    graph = torch.compile(module, dynamic=False)
+                else:
+                    graph = self._load_or_trace(key, module, inputs, device, precision)
+            except Exception as e:
+                log_event("ENGINE", f"Compile failed → {key} | eager fallback ({e})")
+                self._failed.add(key)
+                return module
+
+            self._graphs[key] = graph
+            return graph
+
+    def preload(self, name, device, precision="fp32", stamp=""):
+        """Load every cached bucket for name (warmup). Returns count."""
+        if self.backend != "trace" or not self.cache_dir.exists():
+            return 0
+
+        suffix = self._suffix(device, precision, stamp)
+        loaded = 0
+
+        for path in sorted(self.cache_dir.glob(f"{name}-*-{suffix}.pt")):
+            key = path.stem
+            with self._lock:
+                if key in self._graphs:
+                    continue
+                try:
+                    self._graphs[key] = _TracedGraph(torch.jit.load(str(path), map_location=device), device)
+                    loaded += 1
+                except Exception as e:
+                    log_event("ENGINE", f"Cached graph unreadable → {path.name} ({e})")
+                    path.unlink(missing_ok=True)
+
+        if loaded:
+            log_event("ENGINE", f"Compiled graphs loaded → {name} × {loaded}")
+        return loaded
+
+    # ------------------------------------------------
+    # TorchScript
+    # ------------------------------------------------
+
+    def _load_or_trace(self, key, module, inputs, device, precision):
+        path = self.cache_dir / f"{key}.pt"
+
+        if path.exists():
+            graph = torch.jit.load(str(path), map_location=device)
+            log_event("ENGINE", f"Compiled graph loaded → {key}")
+            return _TracedGraph(graph, device)
+
+        # Callers sit inside inference_mode; tracing needs plain no_grad
+        with torch.inference_mode(False), torch.no_grad(), autocast_context(device, precision):
+            inputs = tuple(t.clone() for t in inputs)
+            if isinstance(module, torch.jit.ScriptModule):
+                graph = module
+            else:
+                graph = torch.jit.trace(module, inputs, check_trace=False)
+
+            graph = torch.jit.freeze(graph.eval())
+            graph(*inputs)   # run once so the profiling executor specialises
+
+        torch.jit.save(graph, str(path))
+        log_event("ENGINE", f"Compiled graph traced → {key}")
+        return _TracedGraph(graph, device)
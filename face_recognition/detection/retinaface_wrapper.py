@@ -142,6 +142,8 @@ class FaceDetector:
 
             result.append({
                 "box": (x1c, y1c, x2c, y2c),
+                # Unpadded detector box (landmark models calibrated on tight boxes)
+                "raw_box": (x1, y1, x2, y2),
                 "score": float(det[4]),
                 "landmarks": landmarks
             })
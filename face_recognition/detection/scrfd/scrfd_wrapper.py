@@ -19,6 +19,13 @@ class SCRFDONNXDetector:
         self.input_name = self.session.get_inputs()[0].name
         self.output_names = [o.name for o in self.session.get_outputs()]
 
+        # Exports with a symbolic batch axis accept stacked frames,
+        # symbolic H/W accept smaller inputs (ROI re-detection)
+        input_shape = self.session.get_inputs()[0].shape
+        self.dynamic_batch = not isinstance(input_shape[0], int)
+        self.dynamic_shape = not isinstance(input_shape[2], int)
+        self.on_gpu = self.session.get_providers()[0] == "CUDAExecutionProvider"
+
         # SCRFD heads config
         self.fmc = 3
         self.strides = [8, 16, 32]
@@ -33,17 +40,28 @@ class SCRFDONNXDetector:
 
     # --------------------------------------------------
 
-    def _preprocess(self, img):
-        img = cv2.resize(img, (self.input_size, self.input_size))
+    def _preprocess(self, img, input_size=None):
+        size = self.input_size_for(input_size)
+        img = cv2.resize(img, (size, size))
         blob = cv2.dnn.blobFromImage(
             img,
             1.0 / self.std,
-            (self.input_size, self.input_size),
+            (size, size),
             (self.mean, self.mean, self.mean),
             swapRB=True
         )
         return blob
 
+    def input_size_for(self, input_size):
+        """
+        Square network input actually used for a requested size.
+        Fixed-shape exports always run at self.input_size.
+        """
+        if input_size is None or not self.dynamic_shape:
+            return self.input_size
+        # heads need a multiple of the largest stride
+        return max(32, int(input_size) // 32 * 32)
+
     # --------------------------------------------------
 
     def _distance2bbox(self, points, distance):
@@ -55,15 +73,45 @@ class SCRFDONNXDetector:
 
     # --------------------------------------------------
 
-    def detect(self, image):
+    def detect(self, image, input_size=None):
         h0, w0 = image.shape[:2]
-        blob = self._preprocess(image)
+        blob = self._preprocess(image, input_size)
 
         outputs = self.session.run(self.output_names, {self.input_name: blob})
 
+        return self._decode(outputs, blob.shape[2], blob.shape[3], w0, h0)
+
+    # --------------------------------------------------
+
+    def detect_batch(self, images, input_size=None):
+        """
+        Detect faces on several frames with as few session runs as possible.
+
+        Models exported with a dynamic batch axis take all frames in one
+        run; fixed batch-1 exports fall back to per-frame runs.
+        input_size overrides the square network input (dynamic H/W exports only).
+        """
+        if not images:
+            return []
+
+        if not self.dynamic_batch:
+            return [self.detect(img, input_size) for img in images]
+
+        blob = np.concatenate([self._preprocess(img, input_size) for img in images], axis=0)
+        outputs = self.session.run(self.output_names, {self.input_name: blob})
+
+        results = []
+        for b, img in enumerate(images):
+            h0, w0 = img.shape[:2]
+            per_image = [out.reshape(len(images), -1, out.shape[-1])[b] for out in outputs]
+            results.append(self._decode(per_image, blob.shape[2], blob.shape[3], w0, h0))
+
+        return results
+
+    # --------------------------------------------------
+
+    def _decode(self, outputs, input_h, input_w, w0, h0):
         scores_list, bboxes_list = [], []
-        input_h = blob.shape[2]
-        input_w = blob.shape[3]
 
         for idx, stride in enumerate(self.strides):
             scores = outputs[idx].reshape(-1)
@@ -97,8 +145,8 @@ class SCRFDONNXDetector:
         bboxes = np.concatenate(bboxes_list)
 
         # scale back to original frame
-        scale_x = w0 / self.input_size
-        scale_y = h0 / self.input_size
+        scale_x = w0 / input_w
+        scale_y = h0 / input_h
         bboxes[:, 0] *= scale_x
         bboxes[:, 2] *= scale_x
         bboxes[:, 1] *= scale_y
@@ -0,0 +1 @@
+# makes this directory a Python package
@@ -0,0 +1,125 @@
+# face_recognition/tracking/best_shot.py
+
+import cv2
+import numpy as np
+
+
+# ============================================================
+# Cheap crop quality (shared with RecognitionEvaluator)
+# ============================================================
+
+def estimate_face_quality(face: np.ndarray) -> float:
+    """
+    Fast forensic proxies:
+    - blur
+    - brightness
+    - contrast
+    - face size
+    """
+
+    gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+
+    blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+    blur_score = min(blur_score / 120.0, 1.0)
+
+    brightness = np.mean(gray) / 255.0
+    brightness_score = 1.0 - abs(brightness - 0.5) * 2
+
+    contrast = np.std(gray) / 128.0
+    contrast_score = min(contrast, 1.0)
+
+    h, w = gray.shape[:2]
+    size_score = min((h * w) / (140 * 140), 1.0)
+
+    quality = (
+        0.30 * blur_score +
+        0.25 * brightness_score +
+        0.25 * contrast_score +
+        0.20 * size_score
+    )
+
+    return float(max(0.0, min(1.0, quality)))
+
+
+# ============================================================
+# Per-track best shot
+# ============================================================
+
+class BestShotSelector:
+    """
+    Keeps the best crop seen per track and a quality-weighted embedding.
+
+    The embedder only needs to run when wants() says a new crop beats the
+    track's current best by at least min_gain.
+    """
+
+    def __init__(self, min_gain: float = 0.02):
+        self.min_gain = min_gain
+        self.tracks = {}
+
+    def wants(self, track_id, quality: float) -> bool:
+        state = self.tracks.get(track_id)
+        if state is None or state["embedding"] is None:
+            return True
+        return quality > state["best_quality"] + self.min_gain
+
+    def update(self, track_id, embedding, quality: float, crop=None):
+        state = self.tracks.setdefault(track_id, {
+            "emb_sum": None,
+            "weight": 0.0,
+            "embedding": None,
+            "best_quality": -1.0,
+            "best_crop": None,
+            "samples": 0
+        })
+
+        if embedding is not None:
+            w = max(quality, 1e-3)
+            weighted = embedding * w
+            state["emb_sum"] = weighted if state["emb_sum"] is None else state["emb_sum"] + weighted
+            state["weight"] += w
+            s = state["emb_sum"]
+            state["embedding"] = s / (np.linalg.norm(s) + 1e-10)
+            state["samples"] += 1
+
+        if quality > state["best_quality"]:
+            state["best_quality"] = quality
+            if crop is not None:
+                state["best_crop"] = crop.copy()
+
+        return state["embedding"]
+
+    def embedding(self, track_id):
+        state = self.tracks.get(track_id)
+        return None if state is None else state["embedding"]
+
+    def best(self, track_id):
+        return self.tracks.get(track_id)
+
+    def merge(self, src_id, dst_id):
+        """Fold src track into dst (e.g. appearance re-identification)."""
+        src = self.tracks.pop(src_id, None)
+        if src is None:
+            return
+
+        dst = self.tracks.get(dst_id)
+        if dst is None:
+            self.tracks[dst_id] = src
+            return
+
+        if src["emb_sum"] is not None:
+            dst["emb_sum"] = src["emb_sum"] if dst["emb_sum"] is None else dst["emb_sum"] + src["emb_sum"]
+            dst["weight"] += src["weight"]
+            dst["samples"] += src["samples"]
+            s = dst["emb_sum"]
+            dst["embedding"] = s / (np.linalg.norm(s) + 1e-10)
+
+        if src["best_quality"] > dst["best_quality"]:
+            dst["best_quality"] = src["best_quality"]
+            dst["best_crop"] = src["best_crop"]
+
+    def drop(self, track_id):
+        self.tracks.pop(track_id, None)
+
+    def reset(self):
+        self.tracks.clear()
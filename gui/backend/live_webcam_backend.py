@@ -4,11 +4,12 @@ from pathlib import Path
 from database.sqlite.criminals_db import DatabaseHandler
 from gui.backend.recognition_worker import RecognitionWorker
 from utils.temp_manager import get_temp_subpath
+from face_recognition.tracking.best_shot import BestShotSelector, estimate_face_quality
+from utils.perf_telemetry import PerfTelemetry
 import time
 from core.ai_engine import get_ai_engine
 from utils.logger import get_logger
 LOG = get_logger()
-from collections import deque
 # =========================================================
 # Global singleton instance
 # =========================================================
@@ -79,6 +80,23 @@ class LiveWebcamBackend:
         self.mask_enabled = True
         self.embedder = self.ai.face_embedder
 
+        # --- Detector budget (CPU gets a smaller full-frame scan) ---
+        if not getattr(self.detector, "on_gpu", True):
+            self.resize_w = 480
+            self.resize_h = 270
+        self.full_scan_interval = 5   # detection rounds between full-frame scans
+        self.roi_expand = 0.6         # ROI margin around a track box
+        self.roi_input_size = 160     # detector input for ROI crops
+        self.detect_round = 0
+
+        # Fixed H/W exports would run every ROI crop at the full input size
+        self.roi_redetect = bool(getattr(self.detector, "dynamic_shape", False))
+        if not self.roi_redetect:
+            LOG.info("[LIVE] SCRFD export has fixed input shape → ROI re-detect off, full-frame scans only")
+
+        # --- Per-stage telemetry ---
+        self.telemetry = PerfTelemetry("live")
+
         # --- Database ---
         self.db = DatabaseHandler()
 
@@ -118,9 +136,10 @@ class LiveWebcamBackend:
         self.last_results = []
 
 
-        # store last embeddings per face index
-        self.embedding_buffers = {}
-        self.embedding_buffer_size = 5   # number of frames to average
+        # --- Best-shot embeddings per track ---
+        self.best_shots = BestShotSelector()
+        self.face_tracks = {}   # track_id -> {"box", "missed"}
+        self.track_max_missed = 3
 
     # ---------------- COSINE SIMILARITY ----------------
     @staticmethod
@@ -175,6 +194,41 @@ class LiveWebcamBackend:
         return self.next_track_id
 
 
+    def _match_tracks(self, boxes):
+        """
+        Greedy IoU association of detections to face tracks.
+        Unmatched tracks age out and release their best shot.
+        """
+        track_ids = []
+        used = set()
+
+        for box in boxes:
+            best_tid, best_iou = None, 0.3
+            for tid, data in self.face_tracks.items():
+                if tid in used:
+                    continue
+                iou = self._iou(box, data["box"])
+                if iou > best_iou:
+                    best_tid, best_iou = tid, iou
+
+            if best_tid is None:
+                self.next_track_id += 1
+                best_tid = self.next_track_id
+
+            used.add(best_tid)
+            self.face_tracks[best_tid] = {"box": box, "missed": 0}
+            track_ids.append(best_tid)
+
+        for tid in list(self.face_tracks):
+            if tid in used:
+                continue
+            self.face_tracks[tid]["missed"] += 1
+            if self.face_tracks[tid]["missed"] > self.track_max_missed:
+                del self.face_tracks[tid]
+                self.best_shots.drop(tid)
+
+        return track_ids
+
     def set_mask_enabled(self, enabled: bool):
         self.mask_enabled = enabled
         LOG.info(f"[LIVE] Mask detection enabled: {enabled}")
@@ -201,6 +255,67 @@ class LiveWebcamBackend:
         return [(best_match, float(best_score * 100))]
 
 
+    # ---------------- DETECTORS ----------------
+    def _detect_full(self, frame):
+        """Whole frame at the CPU/GPU-dependent scan size (frame coords out)."""
+        h0, w0 = frame.shape[:2]
+        small = cv2.resize(frame, (self.resize_w, self.resize_h))
+        scale_x = w0 / self.resize_w
+        scale_y = h0 / self.resize_h
+
+        detections = self.detector.detect(small, input_size=self.resize_w)
+
+        for det in detections:
+            x1, y1, x2, y2 = det["box"]
+            det["box"] = (
+                int(x1 * scale_x), int(y1 * scale_y),
+                int(x2 * scale_x), int(y2 * scale_y)
+            )
+
+        return detections, self.resize_w * self.resize_h
+
+    def _detect_rois(self, frame):
+        """
+        Re-detect only around existing tracks.
+        Expanded track boxes are cropped and sent as one small batch.
+        """
+        h0, w0 = frame.shape[:2]
+        rois, offsets = [], []
+
+        for data in self.face_tracks.values():
+            x1, y1, x2, y2 = data["box"]
+            mx = int((x2 - x1) * self.roi_expand)
+            my = int((y2 - y1) * self.roi_expand)
+            rx1, ry1 = max(0, x1 - mx), max(0, y1 - my)
+            rx2, ry2 = min(w0, x2 + mx), min(h0, y2 + my)
+
+            if rx2 - rx1 < 8 or ry2 - ry1 < 8:
+                continue
+
+            rois.append(frame[ry1:ry2, rx1:rx2])
+            offsets.append((rx1, ry1))
+
+        batch = self.detector.detect_batch(rois, input_size=self.roi_input_size)
+
+        detections = []
+        for dets, (ox, oy) in zip(batch, offsets):
+            for det in dets:
+                x1, y1, x2, y2 = det["box"]
+                det["box"] = (x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+
+                # Overlapping ROIs can see the same face twice
+                dup = next(
+                    (d for d in detections if self._iou(d["box"], det["box"]) > 0.5),
+                    None
+                )
+                if dup is None:
+                    detections.append(det)
+                elif det["score"] > dup["score"]:
+                    detections[detections.index(dup)] = det
+
+        pixels = len(rois) * self.detector.input_size_for(self.roi_input_size) ** 2
+        return detections, pixels
+
     # ---------------- DETECTION + MATCH ----------------
     def detect_and_match(self, frame):
         import time
@@ -208,7 +323,7 @@ class LiveWebcamBackend:
         if self.frame_id % 30 == 0:
             LOG.info("\n[DBG] ===== detect_and_match called =====")
 
-        t_total_start = time.time()
+        t_total_start = time.perf_counter()
 
         if frame is None or frame.size == 0:
             return self.last_results
@@ -222,24 +337,97 @@ class LiveWebcamBackend:
 
         # -------- Skip detection frames --------
         if self.frame_id % self.detect_interval != 0:
+            self.telemetry.count_drop("detect_skipped")
             return self.last_results
 
-        # -------- Resize frame --------
-        small = cv2.resize(frame, (self.resize_w, self.resize_h))
-        scale_x = w0 / self.resize_w
-        scale_y = h0 / self.resize_h
+        # -------- Detection (full scan or ROI re-detect) --------
+        self.detect_round += 1
+        full_scan = (
+            not self.roi_redetect or
+            not self.face_tracks or
+            self.detect_round % self.full_scan_interval == 0
+        )
 
-        # -------- Detection --------
-        t_det_start = time.time()
         try:
-            detections = self.detector.detect(small)
+            with self.telemetry.stage("detect_full" if full_scan else "detect_roi"):
+                if full_scan:
+                    detections, det_pixels = self._detect_full(frame)
+                else:
+                    detections, det_pixels = self._detect_rois(frame)
         except Exception:
+            self.telemetry.count_drop("detect_error")
             return self.last_results
 
-        if self.frame_id % 30 == 0:
-            LOG.info(f"[PERF] SCRFD: {(time.time()-t_det_start)*1000:.2f} ms | faces: {len(detections)}")
-
         # -------- Collect faces --------
+        with self.telemetry.stage("crop"):
+            face_crops, boxes_scaled = self._collect_faces(frame, detections)
+
+        track_ids = self._match_tracks(boxes_scaled)
+
+        if not face_crops:
+            self.last_results = []
+            self.telemetry.record("total", (time.perf_counter() - t_total_start) * 1000.0)
+            self.telemetry.maybe_log()
+            return []
+
+        # -------- Batch mask --------
+        with self.telemetry.stage("mask"):
+            if self.mask_enabled:
+                mask_results = self.classifier.classify_batch(face_crops)
+            else:
+                mask_results = [("No Mask", 1.0)] * len(face_crops)
+
+        # -------- Best-shot gating --------
+        with self.telemetry.stage("quality"):
+            qualities = [estimate_face_quality(c) for c in face_crops]
+            to_embed = [
+                i for i, (tid, q) in enumerate(zip(track_ids, qualities))
+                if self.best_shots.wants(tid, q)
+            ]
+
+        # -------- Batch embeddings (improved crops only) --------
+        with self.telemetry.stage("embed"):
+            new_embs = self.embedder.get_embeddings_batch([face_crops[i] for i in to_embed])
+
+        for i, emb in zip(to_embed, new_embs):
+            self.best_shots.update(track_ids[i], emb, qualities[i])
+
+        self.telemetry.count_drop("embed_skipped", len(face_crops) - len(to_embed))
+
+        results = []
+
+        # -------- Matching loop --------
+        with self.telemetry.stage("match"):
+            for (x1, y1, x2, y2), (label, conf), tid in zip(
+                    boxes_scaled, mask_results, track_ids):
+
+                embedding = self.best_shots.embedding(tid)
+
+                matches = []
+                if embedding is not None:
+                    matches = self.find_match(
+                        embedding,
+                        masked=(label == "Mask")
+                    )
+
+                results.append({
+                    "box": (x1, y1, x2, y2),
+                    "track_id": tid,
+                    "mask_label": label,
+                    "mask_conf": conf,
+                    "matches": matches
+                })
+
+        self.last_results = results
+
+        self.telemetry.set_queue_depth("recognition", len(self.recog_worker.jobs))
+        self.telemetry.record("total", (time.perf_counter() - t_total_start) * 1000.0)
+        self.telemetry.maybe_log()
+
+        return results
+
+    def _collect_faces(self, frame, detections):
+        h0, w0 = frame.shape[:2]
         face_crops = []
         boxes_scaled = []
 
@@ -250,11 +438,6 @@ class LiveWebcamBackend:
             except Exception:
                 continue
 
-            x1 = int(x1 * scale_x)
-            y1 = int(y1 * scale_y)
-            x2 = int(x2 * scale_x)
-            y2 = int(y2 * scale_y)
-
             x1 = max(0, min(x1, w0 - 1))
             y1 = max(0, min(y1, h0 - 1))
             x2 = max(0, min(x2, w0 - 1))
@@ -291,61 +474,7 @@ class LiveWebcamBackend:
             face_crops.append(face_crop)
             boxes_scaled.append((x1, y1, x2, y2))
 
-        # -------- No faces --------
-        if not face_crops:
-            self.last_results = []
-            return []
-
-        # -------- Batch mask --------
-        if self.mask_enabled:
-            mask_results = self.classifier.classify_batch(face_crops)
-        else:
-            mask_results = [("No Mask", 1.0)] * len(face_crops)
-
-        # -------- Batch embeddings --------
-        embeddings = self.embedder.get_embeddings_batch(face_crops)
-
-        results = []
-
-        # -------- Matching loop --------
-        for i, ((x1, y1, x2, y2), (label, conf), emb) in enumerate(
-                zip(boxes_scaled, mask_results, embeddings)):
-
-            if emb is not None:
-                if i not in self.embedding_buffers:
-                    self.embedding_buffers[i] = deque(
-                        maxlen=self.embedding_buffer_size
-                    )
-
-                self.embedding_buffers[i].append(emb)
-                embedding = np.mean(self.embedding_buffers[i], axis=0)
-            else:
-                embedding = None
-
-            matches = []
-            if embedding is not None:
-                matches = self.find_match(
-                    embedding,
-                    masked=(label == "Mask")
-                )
-
-            results.append({
-                "box": (x1, y1, x2, y2),
-                "mask_label": label,
-                "mask_conf": conf,
-                "matches": matches
-            })
-
-        self.last_results = results
-
-        if self.frame_id % 30 == 0:
-            LOG.info(
-                f"[PERF] TOTAL detect_and_match: "
-                f"{(time.time()-t_total_start)*1000:.2f} ms | "
-                f"results: {len(results)}"
-            )
-
-        return results
+        return face_crops, boxes_scaled
 
 
     def _on_recognition_result(self, tid, result):
@@ -370,6 +499,11 @@ class LiveWebcamBackend:
             entry["conf"] = score
             entry["life"] = self.identity_life
 
+    def get_perf_snapshot(self):
+        """JSON-safe per-stage latency / queue / drop snapshot."""
+        return self.telemetry.snapshot()
+
     def shutdown(self):
+        self.telemetry.log_summary()
         self.recog_worker.stop()
         self.recog_worker.wait()
@@ -0,0 +1,501 @@
+import os
+import time
+import queue
+import threading
+import numpy as np
+import cv2
+
+from database.sqlite.criminals_db import DatabaseHandler
+from utils.temp_manager import get_temp_subpath
+from face_recognition.tracking.best_shot import BestShotSelector, estimate_face_quality
+from core.ai_engine import get_ai_engine
+from utils.perf_telemetry import PerfTelemetry
+from utils.logger import get_logger
+LOG = get_logger()
+
+
+# =========================================================
+# Frame sampler (decode thread)
+# =========================================================
+
+class FrameSampler(threading.Thread):
+    """
+    Decodes a video on its own thread and forwards only informative frames.
+
+    • grab() is used for skipped frames (decodes but skips retrieve + colour conversion)
+    • every probe frame is compared against the last emitted one
+    • a frame is emitted on scene change or when max_gap_s has elapsed
+      since the last emitted frame (keyframe fallback)
+    """
+
+    def __init__(self, video_path, out_queue, probe_fps=5.0,
+                 scene_threshold=12.0, max_gap_s=1.0, stop_event=None):
+        super().__init__(daemon=True)
+        self.video_path = video_path
+        self.out_queue = out_queue
+        self.probe_fps = probe_fps
+        self.scene_threshold = scene_threshold
+        self.max_gap_s = max_gap_s
+        self.stop_event = stop_event or threading.Event()
+
+        # Set by the consumer when it stops reading (finished or crashed)
+        self._halted = threading.Event()
+
+        self.fps = 0.0
+        self.frame_count = 0
+        self.frames_read = 0
+        self.frames_emitted = 0
+        self.error = None
+
+    def halt(self):
+        """Consumer is gone → stop decoding and never block on the queue."""
+        self._halted.set()
+
+    def _put(self, item):
+        # Bounded queue → decoder waits for inference (back-pressure),
+        # but gives up once the consumer has halted
+        while not self._halted.is_set():
+            try:
+                self.out_queue.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _signature(self, frame):
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+
+        try:
+            if not cap.isOpened():
+                self.error = f"Cannot open video: {self.video_path}"
+                return
+
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+            probe_stride = max(1, int(round(self.fps / self.probe_fps)))
+            last_sig = None
+            last_emit_ts = -1e9
+            frame_idx = -1
+
+            while not (self.stop_event.is_set() or self._halted.is_set()):
+                if not cap.grab():
+                    break
+
+                frame_idx += 1
+                self.frames_read += 1
+
+                if frame_idx % probe_stride != 0:
+                    continue
+
+                ok, frame = cap.retrieve()
+                if not ok or frame is None:
+                    continue
+
+                ts = frame_idx / self.fps
+                sig = self._signature(frame)
+
+                scene_change = (
+                    last_sig is None or
+                    float(np.mean(np.abs(sig - last_sig))) >= self.scene_threshold
+                )
+                keyframe_due = (ts - last_emit_ts) >= self.max_gap_s
+
+                if not (scene_change or keyframe_due):
+                    continue
+
+                last_sig = sig
+                last_emit_ts = ts
+                self.frames_emitted += 1
+
+                self._put((frame_idx, ts, frame))
+
+        finally:
+            cap.release()
+            self._put(None)
+
+
+# =========================================================
+# Video Scan Backend
+# =========================================================
+
+class VideoScanBackend:
+    """
+    Headless offline video scanner (SCRFD + ArcFace)
+
+    ✔ Decode + sampling on a separate thread
+    ✔ Batched detection / mask / embedding
+    ✔ IoU + embedding tracking to deduplicate identities
+    ✔ Best-shot gating: ArcFace only runs on crops that improve a track
+    ✔ Timeline of gallery hits with best-quality thumbnails
+    """
+
+    def __init__(self, device="cuda", batch_size=8, detect_max_side=640,
+                 min_face=40, track_gap_s=2.0):
+        self.device = device
+        self.batch_size = batch_size
+        self.detect_max_side = detect_max_side
+        self.min_face = min_face
+        self.track_gap_s = track_gap_s
+        self._track_seq = 0
+        self.telemetry = PerfTelemetry("videoscan")
+
+        # --- AI Engine (shared) ---
+        self.ai = get_ai_engine()
+        self.detector = self.ai.live_detector
+        self.classifier = self.ai.mask_classifier
+        self.embedder = self.ai.face_embedder
+        self.mask_enabled = True
+
+        # --- Gallery (vectorised) ---
+        self.db = DatabaseHandler()
+        self._load_gallery()
+
+        self.thumb_dir = get_temp_subpath("videoscan/thumbnails")
+
+        LOG.info(f"[VIDEO] Video scan backend ready | gallery={len(self.gallery_ids)}")
+
+    # ---------------- GALLERY ----------------
+    def _load_gallery(self):
+        ids, embs = [], []
+
+        for criminal_id, emb in self.db.fetch_all_embeddings():
+            if emb is None or emb.size == 0:
+                continue
+            ids.append(criminal_id)
+            embs.append(emb / (np.linalg.norm(emb) + 1e-10))
+
+        self.gallery_ids = ids
+        self.gallery = np.stack(embs).astype(np.float32) if embs else None
+
+        self.id_name_map = {}
+        for criminal_id in set(ids):
+            criminal = self.db.fetch_criminal_by_id(criminal_id)
+            if criminal:
+                self.id_name_map[criminal_id] = criminal["name"]
+
+    def find_match(self, embedding):
+        if self.gallery is None or embedding is None:
+            return None, 0.0
+
+        e = embedding / (np.linalg.norm(embedding) + 1e-10)
+        scores = self.gallery @ e
+        best = int(np.argmax(scores))
+        criminal_id = self.gallery_ids[best]
+
+        return criminal_id, float(scores[best] * 100)
+
+    # ---------------- HELPERS ----------------
+    @staticmethod
+    def _iou(a, b):
+        ax1, ay1, ax2, ay2 = a
+        bx1, by1, bx2, by2 = b
+        inter_x1 = max(ax1, bx1)
+        inter_y1 = max(ay1, by1)
+        inter_x2 = min(ax2, bx2)
+        inter_y2 = min(ay2, by2)
+        if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
+            return 0.0
+        inter = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
+        area_a = (ax2 - ax1) * (ay2 - ay1)
+        area_b = (bx2 - bx1) * (by2 - by1)
+        return inter / float(area_a + area_b - inter)
+
+    def _downscale(self, frame):
+        h, w = frame.shape[:2]
+        long_side = max(h, w)
+        if long_side <= self.detect_max_side:
+            return frame, 1.0
+        scale = self.detect_max_side / long_side
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        return small, scale
+
+    # ---------------- BATCH STAGE ----------------
+    def _process_batch(self, batch):
+        smalls, scales = zip(*[self._downscale(frame) for _, _, frame in batch])
+        with self.telemetry.stage("detect"):
+            detections = self.detector.detect_batch(list(smalls))
+
+        faces = []
+        for (frame_idx, ts, frame), dets, scale in zip(batch, detections, scales):
+            h0, w0 = frame.shape[:2]
+
+            for det in dets:
+                x1, y1, x2, y2 = [int(v / scale) for v in det["box"]]
+                x1 = max(0, min(x1, w0 - 1))
+                y1 = max(0, min(y1, h0 - 1))
+                x2 = max(0, min(x2, w0 - 1))
+                y2 = max(0, min(y2, h0 - 1))
+
+                if x2 - x1 < self.min_face or y2 - y1 < self.min_face:
+                    continue
+
+                crop = frame[y1:y2, x1:x2]
+                if crop.size == 0:
+                    continue
+
+                faces.append({
+                    "frame_idx": frame_idx,
+                    "ts": ts,
+                    "box": (x1, y1, x2, y2),
+                    "crop": crop
+                })
+
+        if not faces:
+            return []
+
+        crops = [f["crop"] for f in faces]
+
+        with self.telemetry.stage("mask"):
+            if self.mask_enabled:
+                mask_results = self.classifier.classify_batch(crops)
+            else:
+                mask_results = [("No Mask", 1.0)] * len(crops)
+
+        for face, (label, _) in zip(faces, mask_results):
+            face["masked"] = label == "Mask"
+            face["quality"] = estimate_face_quality(face["crop"])
+
+        return faces
+
+    # ---------------- TRACKING ----------------
+    def _new_track(self, face):
+        self._track_seq += 1
+        return {
+            "id": self._track_seq,
+            "first_ts": face["ts"],
+            "last_ts": face["ts"],
+            "box": face["box"],
+            "masked_votes": 0,
+            "samples": 0,
+            "best_ts": face["ts"]
+        }
+
+    def _update_tracks(self, tracks, faces, shots):
+        """
+        IoU-link faces to tracks, then embed only crops that beat their
+        track's best shot. New tracks are re-identified by appearance.
+        """
+        pending = []
+        pending_q = {}
+        fresh = set()
+
+        for face in sorted(faces, key=lambda f: f["ts"]):
+            best_track, best_iou = None, 0.3
+
+            for track in tracks:
+                if face["ts"] - track["last_ts"] > self.track_gap_s:
+                    continue
+                iou = self._iou(face["box"], track["box"])
+                if iou > best_iou:
+                    best_track, best_iou = track, iou
+
+            if best_track is None:
+                best_track = self._new_track(face)
+                tracks.append(best_track)
+                fresh.add(best_track["id"])
+
+            best_track["last_ts"] = face["ts"]
+            best_track["box"] = face["box"]
+            best_track["samples"] += 1
+            best_track["masked_votes"] += int(face["masked"])
+
+            tid = best_track["id"]
+            q = face["quality"]
+            if shots.wants(tid, q) and q > pending_q.get(tid, -1.0) + shots.min_gain:
+                pending_q[tid] = q
+                pending.append((face, best_track))
+
+        if not pending:
+            return 0
+
+        with self.telemetry.stage("embed"):
+            embeddings = self.embedder.get_embeddings_batch([f["crop"] for f, _ in pending])
+
+        for (face, track), emb in zip(pending, embeddings):
+            while "merged_into" in track:
+                track = track["merged_into"]
+
+            # Re-identify across cuts / occlusions by appearance
+            if track["id"] in fresh and emb is not None:
+                fresh.discard(track["id"])
+                target, best_sim = None, 0.6
+
+                for other in tracks:
+                    if other is track or "merged_into" in other:
+                        continue
+                    if track["first_ts"] - other["last_ts"] > self.track_gap_s:
+                        continue
+                    other_emb = shots.embedding(other["id"])
+                    if other_emb is None:
+                        continue
+                    sim = float(np.dot(other_emb, emb))
+                    if sim > best_sim:
+                        target, best_sim = other, sim
+
+                if target is not None:
+                    shots.merge(track["id"], target["id"])
+                    target["last_ts"] = max(target["last_ts"], track["last_ts"])
+                    target["box"] = track["box"]
+                    target["samples"] += track["samples"]
+                    target["masked_votes"] += track["masked_votes"]
+                    track["merged_into"] = target
+                    track = target
+
+            state = shots.best(track["id"])
+            if state is None or face["quality"] > state["best_quality"]:
+                track["best_ts"] = face["ts"]
+
+            shots.update(track["id"], emb, face["quality"], face["crop"])
+
+        tracks[:] = [t for t in tracks if "merged_into" not in t]
+
+        return len(pending)
+
+    # ---------------- TIMELINE ----------------
+    def _build_timeline(self, tracks, shots, video_name):
+        hits = {}
+        unknown = 0
+
+        for track in tracks:
+            shot = shots.best(track["id"])
+            if shot is None or shot["embedding"] is None:
+                continue
+
+            masked = track["masked_votes"] * 2 > track["samples"]
+            criminal_id, score = self.find_match(shot["embedding"])
+            threshold = 28 if masked else 50
+
+            if criminal_id is None or score < threshold:
+                unknown += 1
+                continue
+
+            thumb = os.path.join(self.thumb_dir, f"{video_name}_track{track['id']:04d}.jpg")
+            cv2.imwrite(thumb, shot["best_crop"])
+
+            appearance = {
+                "start": round(track["first_ts"], 2),
+                "end": round(track["last_ts"], 2),
+                "score": round(score, 2),
+                "masked": masked,
+                "best_ts": round(track["best_ts"], 2),
+                "quality": round(shot["best_quality"], 3),
+                "thumbnail": thumb
+            }
+
+            # Deduplicate identities → one entry per criminal
+            hit = hits.setdefault(criminal_id, {
+                "criminal_id": criminal_id,
+                "name": self.id_name_map.get(criminal_id, str(criminal_id)),
+                "best_score": 0.0,
+                "thumbnail": thumb,
+                "best_quality": -1.0,
+                "appearances": []
+            })
+            hit["appearances"].append(appearance)
+            hit["best_score"] = max(hit["best_score"], appearance["score"])
+            if appearance["quality"] > hit["best_quality"]:
+                hit["best_quality"] = appearance["quality"]
+                hit["thumbnail"] = thumb
+
+        timeline = sorted(hits.values(), key=lambda h: h["appearances"][0]["start"])
+        for hit in timeline:
+            hit["appearances"].sort(key=lambda a: a["start"])
+
+        return timeline, unknown
+
+    # ---------------- MAIN ENTRY ----------------
+    def scan(self, video_path, progress_callback=None, stop_event=None):
+        """
+        Scan a video file and return a timeline of gallery hits.
+
+        Returns:
+            dict with video metadata, timing stats and "hits"
+            (one entry per identity, each with timestamped appearances)
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video not found: {video_path}")
+
+        LOG.info(f"[VIDEO] Scan started → {video_path}")
+        t0 = time.time()
+
+        frames = queue.Queue(maxsize=self.batch_size * 4)
+        sampler = FrameSampler(video_path, frames, stop_event=stop_event)
+        sampler.start()
+
+        tracks = []
+        shots = BestShotSelector()
+        self._track_seq = 0
+        self.telemetry.reset()
+        batch = []
+        faces_seen = 0
+        faces_embedded = 0
+        done = False
+
+        try:
+            while not done:
+                self.telemetry.set_queue_depth("frames", frames.qsize())
+                with self.telemetry.stage("wait_decode"):
+                    item = frames.get()
+
+                if item is None:
+                    done = True
+                else:
+                    batch.append(item)
+                    self.telemetry.tick_frame()
+
+                if batch and (done or len(batch) >= self.batch_size):
+                    faces = self._process_batch(batch)
+                    faces_seen += len(faces)
+                    faces_embedded += self._update_tracks(tracks, faces, shots)
+
+                    if progress_callback and sampler.frame_count:
+                        progress_callback(min(1.0, batch[-1][0] / sampler.frame_count))
+
+                    batch = []
+
+        finally:
+            # Also on errors: unblock the sampler so it releases the capture
+            sampler.halt()
+            while True:
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    break
+            sampler.join()
+
+        if sampler.error:
+            raise ValueError(sampler.error)
+
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        timeline, unknown = self._build_timeline(tracks, shots, video_name)
+
+        elapsed = time.time() - t0
+        duration = sampler.frames_read / sampler.fps if sampler.fps else 0.0
+
+        LOG.info(
+            f"[VIDEO] Scan finished in {elapsed:.1f}s | "
+            f"video={duration:.1f}s ({duration / max(elapsed, 1e-6):.1f}x real time) | "
+            f"sampled={sampler.frames_emitted}/{sampler.frames_read} | "
+            f"faces={faces_seen} (embedded {faces_embedded}) | tracks={len(tracks)} | hits={len(timeline)}"
+        )
+        self.telemetry.log_summary()
+
+        return {
+            "video_path": video_path,
+            "fps": sampler.fps,
+            "duration_s": round(duration, 2),
+            "frames_total": sampler.frames_read,
+            "frames_sampled": sampler.frames_emitted,
+            "faces_processed": faces_seen,
+            "faces_embedded": faces_embedded,
+            "tracks": len(tracks),
+            "unknown_tracks": unknown,
+            "elapsed_s": round(elapsed, 2),
+            "speed_x": round(duration / max(elapsed, 1e-6), 2),
+            "perf": self.telemetry.snapshot(),
+            "hits": timeline
+        }
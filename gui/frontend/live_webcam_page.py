@@ -1,7 +1,7 @@
 import cv2
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QPushButton, QHBoxLayout, QMessageBox, QSizePolicy
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor, QFont
 import time
 from PyQt5.QtWidgets import QFrame
 from PyQt5.QtWidgets import QScrollArea
@@ -193,12 +193,25 @@ class RecognitionDropItem(QFrame):
 
 
 class LiveWebcamPage(QWidget):
+    PERF_OVERLAY_STAGES = (
+        "capture", "detect_full", "detect_roi", "crop",
+        "mask", "embed", "match", "render"
+    )
+
     def __init__(self, stacked_widget, main_menu, device="cuda"):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.main_menu = main_menu
         self.device = device
         self.last_frame = None
+        self.last_results = []
+
+        # --- Render buffers (reused every frame) ---
+        self._frame_buf = None
+        self._pixmap = None
+        self._bgr_supported = hasattr(QImage, "Format_BGR888")   # Qt >= 5.14
+        self._overlay_font = QFont("Arial", 11)
+        self._overlay_font.setBold(True)
 
         LOG.info("[LIVE-UI] Live webcam page opened")
         LOG.info(f"[LIVE-UI] UI device mode set to: {device}")
@@ -417,10 +430,10 @@ class LiveWebcamPage(QWidget):
 
         # --- Overlay container ---
         self.overlay = QFrame(self.video_label)
-        self.overlay.setFixedSize(200, 70)
+        self.overlay.setFixedSize(260, 230)
         self.setMinimumSize(1200, 750)
 
-        self.overlay.move(self.video_label.width() - 220, 20)
+        self.overlay.move(self.video_label.width() - 280, 20)
         self.overlay.setStyleSheet("""
             QFrame {
                 background-color: rgba(0, 0, 0, 160);
@@ -441,8 +454,15 @@ class LiveWebcamPage(QWidget):
         self.fps_label = QLabel("FPS: 0")
         self.fps_label.setStyleSheet("color: white;")
 
+        # Per-stage p50 / p95 (ms) from backend telemetry
+        self.perf_label = QLabel("")
+        self.perf_label.setStyleSheet(
+            "color: #9fefff; font-family: Consolas, monospace; font-size: 11px; border: none;"
+        )
+
         overlay_layout.addWidget(self.status_label)
         overlay_layout.addWidget(self.fps_label)
+        overlay_layout.addWidget(self.perf_label)
 
         self.overlay.show()
 
@@ -647,7 +667,7 @@ class LiveWebcamPage(QWidget):
         super().resizeEvent(event)
 
         # --- Overlay top-right of video ---
-        self.overlay.move(self.video_label.width() - 220, 20)
+        self.overlay.move(self.video_label.width() - 280, 20)
 
 
         # --- Recognition panel right side (LOCKED to video frame) ---
@@ -720,82 +740,131 @@ class LiveWebcamPage(QWidget):
         if not self.cap:
             return
 
-        if not self.cap:
-            return
+        telemetry = self.backend.telemetry
 
-        ret, frame = self.cap.read()
+        with telemetry.stage("capture"):
+            ret, frame = self.cap.read()
         if not ret:
+            telemetry.count_drop("capture_fail")
             self.video_label.setText("Error: Unable to read frame")
             return
 
-        frame = cv2.flip(frame, 1)
+        # Mirror into a persistent buffer (no per-frame allocation)
+        if self._frame_buf is None or self._frame_buf.shape != frame.shape:
+            self._frame_buf = frame.copy()
+        cv2.flip(frame, 1, self._frame_buf)
+        frame = self._frame_buf
+
         results = self.backend.detect_and_match(frame)
 
-        for res in results:
-            x1, y1, x2, y2 = res["box"]
-            mask_label = res["mask_label"]
-            mask_conf = res["mask_conf"]
+        # Backend hands back the same list on skipped frames → panels unchanged
+        if results is not self.last_results:
+            self._update_panels(results)
 
-            color = (0, 255, 0) if mask_label == "Mask" else (0, 0, 255)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        # --- FPS calculation ---
+        current_time = time.time()
+        dt = current_time - self.prev_time
+        self.prev_time = current_time
 
-            cv2.putText(frame, f"{mask_label} ({mask_conf*100:.1f}%)",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        if dt > 0:
+            inst_fps = 1.0 / dt
+            self.fps_window.append(inst_fps)
 
-            # ---- Unknown / Known handling ----
+        if len(self.fps_window) > 0:
+            self.fps = sum(self.fps_window) / len(self.fps_window)
 
-            recognized = False
+        self.fps_label.setText(f"FPS: {self.fps:.1f}")
+
+        self.status_label.setText("Camera: ON")
+
+        # Reference only; capture_frame copies on demand
+        self.last_frame = frame
+        self.last_results = results
+
+        if self.backend.frame_id % 2 == 0:
+            with telemetry.stage("render"):
+                self._display_frame(frame, results)
+        else:
+            telemetry.count_drop("render_skipped")
+
+        telemetry.tick_frame()
+
+        if self.backend.frame_id % 15 == 0:
+            self.perf_label.setText(telemetry.overlay_text(self.PERF_OVERLAY_STAGES))
 
-            for rank, (name, sim) in enumerate(res["matches"]):
 
-                # ✅ Dynamic threshold
-                if (mask_label == "Mask" and sim >= 28) or (mask_label != "Mask" and sim >= 50):
+    def _is_recognized(self, mask_label, sim):
+        # ✅ Dynamic threshold
+        return (mask_label == "Mask" and sim >= 28) or (mask_label != "Mask" and sim >= 50)
 
+    def _update_panels(self, results):
+        for res in results:
+            mask_label = res["mask_label"]
+
+            recognized = False
+
+            for name, sim in res["matches"]:
+                if self._is_recognized(mask_label, sim):
                     recognized = True
                     self.add_recognized_person(name, sim, mask_label)
-
-                    cv2.putText(frame, f"{rank+1}: {name} ({sim:.1f}%)",
-                                (x1, y2 + 20 + rank*20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
                     break
 
-
             # ---- If nobody crossed DB threshold → UNKNOWN (grouped by IoU) ----
             if not recognized:
                 self.add_unknown_person(res["box"], mask_label)
-                cv2.putText(frame, "Unknown",
-                            (x1, y2 + 20),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 180, 255), 2)
 
+    def _overlay_items(self, results):
+        """Box + text per face, shared by the Qt view and snapshot paths."""
+        items = []
 
-        # --- FPS calculation ---
-        current_time = time.time()
-        dt = current_time - self.prev_time
-        self.prev_time = current_time
+        for res in results:
+            mask_label = res["mask_label"]
+            color = (0, 255, 0) if mask_label == "Mask" else (255, 0, 0)   # RGB
+            lines = [(f"{mask_label} ({res['mask_conf']*100:.1f}%)", color, -10)]
 
-        if dt > 0:
-            inst_fps = 1.0 / dt
-            self.fps_window.append(inst_fps)
+            label = None
+            for rank, (name, sim) in enumerate(res["matches"]):
+                if self._is_recognized(mask_label, sim):
+                    label = (f"{rank+1}: {name} ({sim:.1f}%)", color, None)
+                    break
 
-        if len(self.fps_window) > 0:
-            self.fps = sum(self.fps_window) / len(self.fps_window)
+            if label is None:
+                label = ("Unknown", (255, 180, 0), None)
+            lines.append(label)
 
-        self.fps_label.setText(f"FPS: {self.fps:.1f}")
+            items.append((res["box"], color, lines))
 
-        self.status_label.setText("Camera: ON")
-        self.last_frame = frame.copy()
+        return items
 
-        if self.backend.frame_id % 2 == 0:
-            self._display_frame(frame)
+    def _display_frame(self, frame, results=()):
+        h, w = frame.shape[:2]
+
+        # Wrap the BGR buffer directly; no colour conversion or copy
+        if self._bgr_supported:
+            qt_frame = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+        else:
+            qt_frame = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888).rgbSwapped()
+
+        if self._pixmap is None or self._pixmap.width() != w or self._pixmap.height() != h:
+            self._pixmap = QPixmap(w, h)
+        self._pixmap.convertFromImage(qt_frame)
+
+        painter = QPainter(self._pixmap)
+        painter.setFont(self._overlay_font)
+
+        for (x1, y1, x2, y2), color, lines in self._overlay_items(results):
+            pen = QPen(QColor(*color))
+            pen.setWidth(2)
+            painter.setPen(pen)
+            painter.drawRect(x1, y1, x2 - x1, y2 - y1)
 
+            for text, text_color, dy in lines:
+                painter.setPen(QColor(*text_color))
+                painter.drawText(x1, y1 + dy if dy is not None else y2 + 20, text)
 
+        painter.end()
 
-    def _display_frame(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
-        qt_frame = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
-        self.video_label.setPixmap(QPixmap.fromImage(qt_frame))
+        self.video_label.setPixmap(self._pixmap)
 
     def closeEvent(self, event):
         LOG.info("[LIVE-UI] Live webcam page closed (window event)")
@@ -874,7 +943,18 @@ class LiveWebcamPage(QWidget):
         )
 
         if filename:
-            cv2.imwrite(filename, self.last_frame)
+            # Only copy here: overlays are burned into the snapshot, not the live buffer
+            snapshot = self.last_frame.copy()
+
+            for (x1, y1, x2, y2), color, lines in self._overlay_items(self.last_results):
+                bgr = color[::-1]
+                cv2.rectangle(snapshot, (x1, y1), (x2, y2), bgr, 2)
+                for text, text_color, dy in lines:
+                    cv2.putText(snapshot, text,
+                                (x1, y1 + dy if dy is not None else y2 + 20),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, text_color[::-1], 2)
+
+            cv2.imwrite(filename, snapshot)
             QMessageBox.information(self, "Saved", "Snapshot saved successfully.")
             LOG.info(f"[LIVE-UI] Snapshot captured and saved → {filename}")
 
@@ -0,0 +1,67 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+
+from utils.logger import init_logger
+init_logger(Path(tempfile.mkdtemp()))
+
+from auto_enhancer.quality_assessment.QualityChecker.post_qc.landmark_pose_checker import (
+    LandmarkPoseChecker, _MODEL_POINTS, _LANDMARK_KEYS
+)
+
+WIDTH, HEIGHT = 640, 480
+
+
+def project(roll_deg=0.0, distance=600.0):
+    """Canonical 5-pt face rotated about the optical axis, pinhole-projected."""
+    a = np.radians(roll_deg)
+    rz = np.array([
+        [np.cos(a), -np.sin(a), 0.0],
+        [np.sin(a), np.cos(a), 0.0],
+        [0.0, 0.0, 1.0]
+    ])
+    pts = _MODEL_POINTS @ rz.T + np.array([0.0, 0.0, distance])
+
+    focal = float(max(WIDTH, HEIGHT))
+    u = focal * pts[:, 0] / pts[:, 2] + WIDTH / 2.0
+    v = focal * pts[:, 1] / pts[:, 2] + HEIGHT / 2.0
+
+    return {k: (float(x), float(y)) for k, x, y in zip(_LANDMARK_KEYS, u, v)}
+
+
+class Tester(unittest.TestCase):
+    def setUp(self):
+        self.checker = LandmarkPoseChecker(calibration_path=None)
+
+    def test_canonical_frontal(self):
+        pose = self.checker.estimate(project(), WIDTH, HEIGHT, calibrated=False)
+
+        self.assertIsNotNone(pose)
+        for axis in ("yaw", "pitch", "roll"):
+            self.assertAlmostEqual(pose[axis], 0.0, delta=1.0, msg=axis)
+
+    def test_rolled(self):
+        for roll in (10.0, -10.0):
+            pose = self.checker.estimate(project(roll), WIDTH, HEIGHT, calibrated=False)
+
+            self.assertIsNotNone(pose)
+            # roll > 0 → right eye lower (FANPoseChecker convention)
+            self.assertAlmostEqual(pose["roll"], roll, delta=1.0)
+            self.assertAlmostEqual(pose["yaw"], 0.0, delta=1.0)
+            self.assertAlmostEqual(pose["pitch"], 0.0, delta=1.0)
+
+    def test_calibration_applied(self):
+        self.checker.calibration = {"pitch": (1.0, 27.0)}
+        pose = self.checker.estimate(project(), WIDTH, HEIGHT)
+
+        self.assertAlmostEqual(pose["pitch"], 27.0, delta=1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# tuning/benchmark_hidiff_profiles.py
+"""
+HI-Diff profile benchmark: quality vs latency.
+
+Sharp inputs are synthetically blurred (motion + defocus, three levels),
+then every profile in HIDIFF_PROFILES restores them. Reports PSNR / SSIM
+against the sharp original and wall-clock latency, so STRENGTH_PROFILES
+in hidiff_wrapper.py can be set from measurements.
+
+Usage:
+    python tuning/benchmark_hidiff_profiles.py --input tuning/test.jpg
+    python tuning/benchmark_hidiff_profiles.py --input <folder> --repeat 5 --max-side 512
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+HI_DIFF_ROOT = PROJECT_ROOT / "auto_enhancer" / "enhancement" / "deblurring" / "HI_Diff"
+sys.path.insert(0, str(HI_DIFF_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import cv2
+import numpy as np
+
+from utils.logger import init_logger
+
+# blur level → (motion length px, defocus sigma)
+BLUR_LEVELS = {
+    "light":  (7, 0.8),
+    "medium": (13, 1.4),
+    "heavy":  (21, 2.2),
+}
+
+
+def synth_blur(img, length, sigma, angle=20.0):
+    kernel = np.zeros((length, length), dtype=np.float32)
+    kernel[length // 2, :] = 1.0
+    rot = cv2.getRotationMatrix2D((length / 2 - 0.5, length / 2 - 0.5), angle, 1.0)
+    kernel = cv2.warpAffine(kernel, rot, (length, length))
+    kernel /= kernel.sum()
+
+    out = cv2.filter2D(img, -1, kernel, borderType=cv2.BORDER_REFLECT)
+    return cv2.GaussianBlur(out, (0, 0), sigma)
+
+
+def load_images(path, max_side):
+    p = Path(path)
+    files = sorted(
+        f for f in (p.iterdir() if p.is_dir() else [p])
+        if f.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp")
+    )
+
+    images = []
+    for f in files:
+        img = cv2.imread(str(f))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        scale = max_side / max(h, w)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        images.append((f.name, img))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HI-Diff profile quality/latency benchmark")
+    parser.add_argument("--input", default=str(PROJECT_ROOT / "tuning" / "test.jpg"))
+    parser.add_argument("--profiles", nargs="*", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-side", type=int, default=512)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--out", default=str(PROJECT_ROOT / "tuning" / "hidiff_profile_benchmark.json"))
+    args = parser.parse_args()
+
+    init_logger(PROJECT_ROOT / "tuning")
+
+    from basicsr.metrics import calculate_psnr, calculate_ssim
+    from auto_enhancer.enhancement.deblurring.HI_Diff.hidiff_engine import HIDIFF_PROFILES, HiDiffEngine
+
+    images = load_images(args.input, args.max_side)
+    if not images:
+        raise SystemExit(f"No images found at {args.input}")
+
+    engine = HiDiffEngine(device=args.device)
+    profiles = args.profiles or list(HIDIFF_PROFILES)
+
+    rows = []
+
+    for level, (length, sigma) in BLUR_LEVELS.items():
+        for name, sharp in images:
+            blurred = synth_blur(sharp, length, sigma)
+            base_psnr = calculate_psnr(blurred, sharp, crop_border=0)
+            base_ssim = calculate_ssim(blurred, sharp, crop_border=0)
+
+            for profile in profiles:
+                engine.deblur(blurred, profile=profile)   # build + warm
+
+                times = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    restored = engine.deblur(blurred, profile=profile)
+                    times.append((time.perf_counter() - t0) * 1000.0)
+
+                psnr = calculate_psnr(restored, sharp, crop_border=0)
+                ssim = calculate_ssim(restored, sharp, crop_border=0)
+
+                rows.append({
+                    "image": name,
+                    "blur": level,
+                    "profile": profile,
+                    "psnr": round(float(psnr), 3),
+                    "ssim": round(float(ssim), 4),
+                    "psnr_gain": round(float(psnr - base_psnr), 3),
+                    "ssim_gain": round(float(ssim - base_ssim), 4),
+                    "latency_ms_mean": round(float(np.mean(times)), 1),
+                    "latency_ms_p95": round(float(np.percentile(times, 95)), 1),
+                })
+
+    # ---------- Summary: mean per (blur, profile) ----------
+    print(f"\n{'blur':<8} {'profile':<15} {'PSNR':>7} {'+dB':>6} {'SSIM':>7} {'ms':>9}")
+    print("-" * 58)
+
+    summary = []
+    for level in BLUR_LEVELS:
+        for profile in profiles:
+            sel = [r for r in rows if r["blur"] == level and r["profile"] == profile]
+            entry = {
+                "blur": level,
+                "profile": profile,
+                "psnr": round(float(np.mean([r["psnr"] for r in sel])), 3),
+                "psnr_gain": round(float(np.mean([r["psnr_gain"] for r in sel])), 3),
+                "ssim": round(float(np.mean([r["ssim"] for r in sel])), 4),
+                "latency_ms": round(float(np.mean([r["latency_ms_mean"] for r in sel])), 1),
+            }
+            summary.append(entry)
+            print(
+                f"{level:<8} {profile:<15} {entry['psnr']:7.2f} {entry['psnr_gain']:+6.2f} "
+                f"{entry['ssim']:7.4f} {entry['latency_ms']:9.1f}"
+            )
+
+    with open(args.out, "w") as f:
+        json.dump({"device": engine.device, "summary": summary, "rows": rows}, f, indent=2)
+
+    print(f"\nSaved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# tuning/calibrate_pose_backends.py
+"""
+Pose backend calibration: 5-pt PnP vs FAN.
+
+RetinaFace boxes + 5-pt landmarks are detected once per image; every
+face is scored by both QA pose backends. Each image is also rotated
+through ROLL_SWEEP so roll / yaw / pitch cover a useful range even on a
+small tuning set. Reports per-axis MAE and correlation before and after
+a linear fit (FAN ≈ a·PnP + b) plus per-face latency.
+
+--write stores the fit where LandmarkPoseChecker loads it, putting PnP
+angles on FAN's scale (and therefore on the policy thresholds' scale).
+
+Usage:
+    python tuning/calibrate_pose_backends.py --input tuning/test.jpg
+    python tuning/calibrate_pose_backends.py --input <folder> --write
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import cv2
+import numpy as np
+
+from utils.logger import init_logger
+
+AXES = ("yaw", "pitch", "roll")
+
+# In-plane rotations applied to every tuning image (degrees)
+ROLL_SWEEP = (-20, -12, -6, 0, 6, 12, 20)
+
+
+def load_images(path, max_side):
+    p = Path(path)
+    files = sorted(
+        f for f in (p.iterdir() if p.is_dir() else [p])
+        if f.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp")
+    )
+
+    images = []
+    for f in files:
+        img = cv2.imread(str(f))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        scale = max_side / max(h, w)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        images.append((f.name, img))
+    return images
+
+
+def rotate(img, angle):
+    h, w = img.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+    return cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+
+def fit_axis(pnp, fan):
+    pnp, fan = np.asarray(pnp), np.asarray(fan)
+    if len(pnp) < 2 or np.ptp(pnp) < 1e-6:
+        return 1.0, float(np.mean(fan - pnp)) if len(pnp) else 0.0
+    a, b = np.polyfit(pnp, fan, 1)
+    return float(a), float(b)
+
+
+def axis_stats(pnp, fan):
+    pnp, fan = np.asarray(pnp), np.asarray(fan)
+    corr = float(np.corrcoef(pnp, fan)[0, 1]) if len(pnp) > 1 and np.ptp(pnp) > 0 and np.ptp(fan) > 0 else None
+    return {
+        "mae": round(float(np.mean(np.abs(pnp - fan))), 3),
+        "max_err": round(float(np.max(np.abs(pnp - fan))), 3),
+        "corr": round(corr, 4) if corr is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="5-pt PnP vs FAN pose calibration")
+    parser.add_argument("--input", default=str(PROJECT_ROOT / "tuning" / "test.jpg"))
+    parser.add_argument("--max-side", type=int, default=1024)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--out", default=str(PROJECT_ROOT / "tuning" / "pose_backend_benchmark.json"))
+    parser.add_argument("--write", action="store_true", help="save the fit for LandmarkPoseChecker")
+    args = parser.parse_args()
+
+    init_logger(PROJECT_ROOT / "tuning")
+
+    import torch
+    from face_recognition.detection.retinaface_wrapper import FaceDetector
+    from auto_enhancer.quality_assessment.QualityChecker.post_qc.pose_checker import FANPoseChecker
+    from auto_enhancer.quality_assessment.QualityChecker.post_qc.landmark_pose_checker import (
+        LandmarkPoseChecker, POSE_CALIBRATION_PATH
+    )
+
+    images = load_images(args.input, args.max_side)
+    if not images:
+        raise SystemExit(f"No images found at {args.input}")
+
+    device = args.device or ("cuda" if torch.cuda.is_available() else "cpu")
+    detector = FaceDetector(network="resnet50")
+    fan = FANPoseChecker(device=device)
+    pnp = LandmarkPoseChecker(calibration_path=None)   # raw angles for the fit
+
+    rows = []
+    fan_ms, pnp_ms = [], []
+
+    for name, base in images:
+        for angle in ROLL_SWEEP:
+            img = rotate(base, angle)
+            dets = detector.detect(img)
+            if not dets:
+                continue
+
+            boxes = [np.array(d.get("raw_box", d["box"]), dtype=np.float32) for d in dets]
+            landmarks = [d["landmarks"] for d in dets]
+            h, w = img.shape[:2]
+
+            fan.analyze_faces(img, boxes)   # warm
+            t0 = time.perf_counter()
+            fan_out = fan.analyze_faces(img, boxes)
+            fan_ms.append((time.perf_counter() - t0) * 1000.0 / len(boxes))
+
+            t0 = time.perf_counter()
+            pnp_out = [pnp.estimate(lm, w, h, calibrated=False) for lm in landmarks]
+            pnp_ms.append((time.perf_counter() - t0) * 1000.0 / len(boxes))
+
+            for face_id, (f, p) in enumerate(zip(fan_out, pnp_out)):
+                if not f or not p:
+                    continue
+                rows.append({
+                    "image": name,
+                    "rotation": angle,
+                    "face_id": face_id,
+                    **{f"fan_{k}": f[k] for k in AXES},
+                    **{f"pnp_{k}": p[k] for k in AXES},
+                })
+
+    if not rows:
+        raise SystemExit("No face was scored by both backends")
+
+    # ---------- Fit + error before / after ----------
+    fit, before, after = {}, {}, {}
+    for axis in AXES:
+        x = [r[f"pnp_{axis}"] for r in rows]
+        y = [r[f"fan_{axis}"] for r in rows]
+        a, b = fit_axis(x, y)
+        fit[axis] = {"a": round(a, 5), "b": round(b, 5)}
+        before[axis] = axis_stats(x, y)
+        after[axis] = axis_stats([a * v + b for v in x], y)
+
+    print(f"\nfaces={len(rows)} | FAN {np.mean(fan_ms):.2f} ms/face | PnP {np.mean(pnp_ms):.3f} ms/face\n")
+    print(f"{'axis':<6} {'MAE raw':>8} {'MAE fit':>8} {'corr':>7} {'a':>8} {'b':>8}")
+    print("-" * 50)
+    for axis in AXES:
+        print(
+            f"{axis:<6} {before[axis]['mae']:>8.2f} {after[axis]['mae']:>8.2f} "
+            f"{before[axis]['corr'] if before[axis]['corr'] is not None else float('nan'):>7.3f} "
+            f"{fit[axis]['a']:>8.3f} {fit[axis]['b']:>8.2f}"
+        )
+
+    result = {
+        "faces": len(rows),
+        "latency_ms_per_face": {
+            "fan": round(float(np.mean(fan_ms)), 3),
+            "pnp": round(float(np.mean(pnp_ms)), 4),
+        },
+        "fit": fit,
+        "error_raw": before,
+        "error_fit": after,
+        "rows": rows,
+    }
+
+    Path(args.out).write_text(json.dumps(result, indent=2))
+    print(f"\nSaved → {args.out}")
+
+    if args.write:
+        calib = {k: result[k] for k in ("faces", "fit", "error_fit")}
+        POSE_CALIBRATION_PATH.write_text(json.dumps(calib, indent=2))
+        print(f"Calibration written → {POSE_CALIBRATION_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# tuning/check_clip_preprocess.py
+"""
+Parity check: CLIPIQA tensor preprocess vs clip's PIL preprocess.
+
+Every sample image is preprocessed both ways and scored through the same
+encoder. Reports max abs pixel diff (0–255 scale, after undoing the CLIP
+normalization) and the CLIP-IQA score drift. Exits non-zero if any score
+drifts by more than --max-drift.
+
+Usage:
+    python tuning/check_clip_preprocess.py --input tuning/test.jpg
+    python tuning/check_clip_preprocess.py --input <folder> --max-drift 0.002
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import cv2
+import torch
+
+from utils.logger import init_logger
+
+
+def load_images(path):
+    p = Path(path)
+    files = sorted(
+        f for f in (p.iterdir() if p.is_dir() else [p])
+        if f.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp")
+    )
+
+    images = []
+    for f in files:
+        img = cv2.imread(str(f))
+        if img is not None:
+            images.append((f.name, img))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLIP-IQA preprocess parity vs PIL")
+    parser.add_argument("--input", default=str(PROJECT_ROOT / "tuning" / "test.jpg"))
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--max-drift", type=float, default=0.002)
+    args = parser.parse_args()
+
+    init_logger(PROJECT_ROOT / "tuning")
+
+    from auto_enhancer.quality_assessment.models.clip_iqa import CLIPIQA
+
+    images = load_images(args.input)
+    if not images:
+        raise SystemExit(f"No images found at {args.input}")
+
+    iqa = CLIPIQA(device=args.device, precision="fp32")
+
+    def score(x):
+        with torch.inference_mode():
+            f = iqa.model.encode_image(x.unsqueeze(0).to(iqa.device)).float()
+        f = f / f.norm(dim=-1, keepdim=True)
+        return iqa._score(f.cpu())[0]["clip_iqa_score"]
+
+    print(f"\n{'image':<24} {'size':>11} {'max px':>7} {'PIL':>8} {'tensor':>8} {'drift':>8}")
+    print("-" * 72)
+
+    failed = False
+    for name, img in images:
+        ref = iqa._preprocess_reference(img).to(iqa.device)
+        out = iqa._preprocess(img)
+
+        max_px = float(((out - ref) * iqa._std[0]).abs().max() * 255.0)
+
+        ref_score, out_score = score(ref), score(out)
+        drift = abs(out_score - ref_score)
+
+        flag = ""
+        if drift > args.max_drift:
+            failed = True
+            flag = "  ← FAIL"
+
+        h, w = img.shape[:2]
+        print(
+            f"{name:<24} {f'{w}x{h}':>11} {max_px:>7.2f} "
+            f"{ref_score:>8.4f} {out_score:>8.4f} {drift:>8.4f}{flag}"
+        )
+
+    if failed:
+        raise SystemExit(f"\nScore drift above {args.max_drift}")
+
+    print("\nTensor preprocess within tolerance.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# tuning/check_precision.py
+"""
+Numeric regression check: reduced precision / channels_last vs fp32.
+
+Runs HI-Diff and the GFPGAN generator twice on the sample images in
+tuning/ — once fp32 NCHW (reference), once with the requested precision
+and channels_last — and reports PSNR / max abs diff of the outputs.
+Exits non-zero if any output falls below --min-psnr.
+
+Usage:
+    python tuning/check_precision.py
+    python tuning/check_precision.py --precision bf16 --min-psnr 38
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+HI_DIFF_ROOT = PROJECT_ROOT / "auto_enhancer" / "enhancement" / "deblurring" / "HI_Diff"
+sys.path.insert(0, str(HI_DIFF_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import cv2
+import numpy as np
+import torch
+
+from utils.logger import init_logger
+
+
+def load_samples(folder, max_side):
+    samples = []
+    for f in sorted(Path(folder).iterdir()):
+        if f.suffix.lower() not in (".jpg", ".jpeg", ".png", ".bmp"):
+            continue
+        img = cv2.imread(str(f))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        scale = max_side / max(h, w)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        samples.append((f.name, img))
+    return samples
+
+
+def center_face(img):
+    h, w = img.shape[:2]
+    s = min(h, w)
+    y, x = (h - s) // 2, (w - s) // 2
+    return cv2.resize(img[y:y + s, x:x + s], (512, 512))
+
+
+def compare(ref, out, calculate_psnr):
+    diff = np.abs(ref.astype(np.int16) - out.astype(np.int16))
+    psnr = calculate_psnr(out, ref, crop_border=0)
+    return float(psnr), int(diff.max()), float(diff.mean())
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precision / layout regression vs fp32")
+    parser.add_argument("--input", default=str(PROJECT_ROOT / "tuning"))
+    parser.add_argument("--precision", default="auto", help="auto | bf16 | fp16 | fp32")
+    parser.add_argument("--no-channels-last", action="store_true")
+    parser.add_argument("--profile", default="realblur_fast")
+    parser.add_argument("--max-side", type=int, default=256)
+    parser.add_argument("--min-psnr", type=float, default=40.0)
+    parser.add_argument("--skip-gfpgan", action="store_true")
+    parser.add_argument("--skip-hidiff", action="store_true")
+    args = parser.parse_args()
+
+    init_logger(PROJECT_ROOT / "tuning")
+
+    from basicsr.metrics import calculate_psnr
+
+    samples = load_samples(args.input, args.max_side)
+    if not samples:
+        raise SystemExit(f"No sample images in {args.input}")
+
+    channels_last = not args.no_channels_last
+    results = []
+
+    # ---------- HI-Diff ----------
+    if not args.skip_hidiff:
+        from auto_enhancer.enhancement.deblurring.HI_Diff.hidiff_engine import HiDiffEngine
+
+        ref_engine = HiDiffEngine(precision="fp32", channels_last=False)
+        test_engine = HiDiffEngine(
+            device=ref_engine.device, precision=args.precision, channels_last=channels_last
+        )
+
+        for name, img in samples:
+            ref_engine.deblur(img, profile=args.profile)    # build + warm
+            test_engine.deblur(img, profile=args.profile)
+
+            ref, ref_ms = timed(lambda: ref_engine.deblur(img, profile=args.profile))
+            out, out_ms = timed(lambda: test_engine.deblur(img, profile=args.profile))
+
+            psnr, max_diff, mean_diff = compare(ref, out, calculate_psnr)
+            results.append(("HI-Diff", name, test_engine.precision, psnr, max_diff, mean_diff, ref_ms, out_ms))
+
+    # ---------- GFPGAN generator (aligned 512 crops) ----------
+    if not args.skip_gfpgan:
+        from auto_enhancer.enhancement.resolution.GFPGAN.gfpgan_wrapper import GFPGANWrapper
+
+        ref_gan = GFPGANWrapper(precision="fp32", channels_last=False).restorer
+        test_gan = GFPGANWrapper(precision=args.precision, channels_last=channels_last).restorer
+
+        def restore(restorer, face):
+            # StyleGAN noise is random → same seed for both runs
+            torch.manual_seed(0)
+            _, restored, _ = restorer.enhance(face, has_aligned=True, paste_back=False, weight=0.5)
+            return restored[0]
+
+        for name, img in samples:
+            face = center_face(img)
+            restore(ref_gan, face)
+            restore(test_gan, face)
+
+            ref, ref_ms = timed(lambda: restore(ref_gan, face))
+            out, out_ms = timed(lambda: restore(test_gan, face))
+
+            psnr, max_diff, mean_diff = compare(ref, out, calculate_psnr)
+            results.append(("GFPGAN", name, test_gan.precision, psnr, max_diff, mean_diff, ref_ms, out_ms))
+
+    # ---------- Report ----------
+    print(f"\n{'model':<8} {'image':<16} {'prec':<5} {'PSNR':>7} {'max':>4} {'mean':>6} {'fp32 ms':>9} {'ms':>9}")
+    print("-" * 72)
+
+    failed = False
+    for model, name, prec, psnr, max_diff, mean_diff, ref_ms, out_ms in results:
+        flag = ""
+        if psnr < args.min_psnr:
+            flag = "  ❌"
+            failed = True
+        print(
+            f"{model:<8} {name[:16]:<16} {prec:<5} {psnr:7.2f} {max_diff:4d} {mean_diff:6.3f} "
+            f"{ref_ms:9.1f} {out_ms:9.1f}{flag}"
+        )
+
+    print("\n❌ Regression above tolerance" if failed else "\n✔ Within tolerance")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# utils/image_stats.py
+
+import cv2
+import numpy as np
+
+
+# ============================================================
+# SINGLE-PASS 8-BIT INTENSITY STATISTICS
+# ============================================================
+
+_LEVELS = np.arange(256, dtype=np.float64)
+
+
+def gray_histogram_stats(gray: np.ndarray, percentiles=(5, 95)) -> dict:
+    """
+    mean / std / min / max / percentiles of a uint8 image from one
+    256-bin histogram (O(n) + O(256)), instead of full-image sorts.
+
+    Percentiles use numpy's default "linear" interpolation, so values
+    match np.percentile exactly.
+    """
+    if gray.dtype != np.uint8:
+        gray = np.clip(gray, 0, 255).astype(np.uint8)
+
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+    n = hist.sum()
+
+    if n == 0:
+        return {"mean": 0.0, "std": 0.0, "min": 0, "max": 0,
+                "percentiles": {q: 0.0 for q in percentiles}, "hist": hist}
+
+    mean = float((hist * _LEVELS).sum() / n)
+    var = float((hist * (_LEVELS - mean) ** 2).sum() / n)
+
+    nz = np.flatnonzero(hist)
+    cdf = np.cumsum(hist)
+
+    def value_at(rank):
+        # smallest level whose cumulative count exceeds the 0-based rank
+        return float(np.searchsorted(cdf, rank, side="right"))
+
+    pct = {}
+    for q in percentiles:
+        pos = (q / 100.0) * (n - 1)
+        lo = int(np.floor(pos))
+        frac = pos - lo
+        v_lo = value_at(lo)
+        v_hi = value_at(min(lo + 1, n - 1)) if frac > 0 else v_lo
+        pct[q] = v_lo + (v_hi - v_lo) * frac
+
+    return {
+        "mean": mean,
+        "std": float(np.sqrt(var)),
+        "min": int(nz[0]),
+        "max": int(nz[-1]),
+        "percentiles": pct,
+        "hist": hist
+    }
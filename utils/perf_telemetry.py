@@ -0,0 +1,156 @@
+# utils/perf_telemetry.py
+
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.logger import log_event
+
+
+# ============================================================
+# PER-STAGE PIPELINE TELEMETRY
+# ============================================================
+
+class PerfTelemetry:
+    """
+    Rolling per-stage latency + throughput collector.
+
+    • stage timings (perf_counter, ms) with p50 / p95 / p99 over a window
+    • queue depths (current + max seen)
+    • drop / skip counters
+    • frame throughput
+
+    Thread-safe: producers and the UI may read/write concurrently.
+    """
+
+    def __init__(self, pipeline: str, window: int = 300, log_every_s: float = 30.0):
+        self.pipeline = pipeline
+        self.window = window
+        self.log_every_s = log_every_s
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counts = {}
+            self._queues = {}
+            self._drops = {}
+            self._frames = deque(maxlen=self.window)
+            self._frame_total = 0
+            self._started = time.perf_counter()
+            self._last_log = self._started
+
+    # ---------------- RECORDING ----------------
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000.0)
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+            self._stages[name].append(ms)
+            self._counts[name] += 1
+
+    def tick_frame(self):
+        with self._lock:
+            self._frames.append(time.perf_counter())
+            self._frame_total += 1
+
+    def set_queue_depth(self, name: str, depth: int):
+        with self._lock:
+            _, peak = self._queues.get(name, (0, 0))
+            self._queues[name] = (depth, max(peak, depth))
+
+    def count_drop(self, name: str, n: int = 1):
+        with self._lock:
+            self._drops[name] = self._drops.get(name, 0) + n
+
+    # ---------------- READING ----------------
+    def _fps(self):
+        if len(self._frames) < 2:
+            return 0.0
+        span = self._frames[-1] - self._frames[0]
+        return (len(self._frames) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {}
+            for name, samples in self._stages.items():
+                arr = np.fromiter(samples, dtype=np.float64)
+                p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+                stages[name] = {
+                    "count": self._counts[name],
+                    "last_ms": round(float(arr[-1]), 3),
+                    "mean_ms": round(float(arr.mean()), 3),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(float(arr.max()), 3)
+                }
+
+            return {
+                "pipeline": self.pipeline,
+                "uptime_s": round(time.perf_counter() - self._started, 2),
+                "frames": self._frame_total,
+                "fps": round(self._fps(), 2),
+                "stages": stages,
+                "queues": {
+                    name: {"depth": depth, "max": peak}
+                    for name, (depth, peak) in self._queues.items()
+                },
+                "drops": dict(self._drops)
+            }
+
+    def to_json(self, indent=None) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def overlay_text(self, stages=None) -> str:
+        """Compact multi-line p50/p95 view for on-screen overlays."""
+        snap = self.snapshot()
+        lines = [f"{snap['fps']:.1f} fps"]
+
+        for name, s in snap["stages"].items():
+            if stages and name not in stages:
+                continue
+            lines.append(f"{name:<7} {s['p50_ms']:5.1f} / {s['p95_ms']:5.1f} ms")
+
+        if snap["drops"]:
+            lines.append("drops " + " ".join(f"{k}={v}" for k, v in snap["drops"].items()))
+
+        return "\n".join(lines)
+
+    # ---------------- SESSION LOG ----------------
+    def log_summary(self):
+        snap = self.snapshot()
+
+        log_event("PERF", f"{self.pipeline} | frames={snap['frames']} | fps={snap['fps']:.1f}")
+        for name, s in snap["stages"].items():
+            log_event(
+                "PERF",
+                f"{self.pipeline}.{name:<10} n={s['count']:<6} "
+                f"p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms "
+                f"p99={s['p99_ms']:.2f}ms max={s['max_ms']:.2f}ms"
+            )
+        for name, q in snap["queues"].items():
+            log_event("PERF", f"{self.pipeline}.queue.{name} depth={q['depth']} max={q['max']}")
+        if snap["drops"]:
+            log_event("PERF", f"{self.pipeline}.drops {snap['drops']}")
+
+        with self._lock:
+            self._last_log = time.perf_counter()
+
+    def maybe_log(self):
+        if time.perf_counter() - self._last_log >= self.log_every_s:
+            self.log_summary()
@@ -18,6 +18,7 @@ SESSION_SUBFOLDERS = {
         "input",
         "livewebcam/detected_faces",
         "livewebcam/recognized",
+        "videoscan/thumbnails",
         "autoenhancement/blur",
         "autoenhancement/noise",
         "autoenhancement/brightness",
@@ -31,9 +32,6 @@ SESSION_SUBFOLDERS = {
 
         "autoenhancement/pose",
         "autoenhancement/mask",
-
-        "datasets/test/RealBlur_J/input",
-        "datasets/test/RealBlur_J/target",
     ],
     "outputs": ["recognized_faces", "reports", "final_images"],
     "config": [],